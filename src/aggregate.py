@@ -0,0 +1,259 @@
+import os
+import posixpath
+import re
+import time
+from collections import defaultdict
+from email.utils import formatdate
+from itertools import islice
+from typing import Dict, Iterator, List, Sequence, Set, Tuple
+
+from escape import escape_attr, escape_text
+from generate import (
+    FRAGMENT_DIR,
+    LeafNode,
+    ParentNode,
+    fragment_values,
+    load_template,
+    open_output,
+    render_template,
+)
+
+
+def parent_url(url: str) -> str:
+    # "/blog/post.html" -> "/blog/", "/blog/" -> "/", "/" -> ""
+    if url == "/":
+        return ""
+    return posixpath.dirname(url.rstrip("/")).rstrip("/") + "/"
+
+
+def url_to_path(public_dir: str, url: str) -> str:
+    path = os.path.join(public_dir, *url.strip("/").split("/"))
+    return os.path.join(path, "index.html") if url.endswith("/") else path
+
+
+def tag_slug(tag: str) -> str:
+    return re.sub(r"[^\w]+", "-", tag.lower()).strip("-") or "-"
+
+
+def write_listing(public_dir: str, url: str, html: str) -> None:
+    dest_path = url_to_path(public_dir, url)
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    with open_output(dest_path) as output:
+        output.write(html)
+
+
+def sitemap_xml(pages: List[Tuple[str, str, float]], base_url: str) -> str:
+    entries = [
+        f"<url><loc>{escape_attr(base_url + url)}</loc>"
+        f"<lastmod>{time.strftime('%Y-%m-%d', time.gmtime(mtime))}</lastmod></url>"
+        for url, _, mtime in pages
+    ]
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        + "".join(entries)
+        + "</urlset>\n"
+    )
+
+
+def rss_xml(
+    pages: List[Tuple[str, str, float]], base_url: str, title: str, limit: int
+) -> str:
+    recent = sorted(pages, key=lambda page: (-page[2], page[0]))[:limit]
+    # the newest page date rather than the wall clock keeps rebuilds identical
+    updated = formatdate(recent[0][2], usegmt=True) if recent else ""
+    items = [
+        f"<item><title>{escape_text(page_title)}</title>"
+        f"<link>{escape_text(base_url + url)}</link>"
+        f"<guid>{escape_text(base_url + url)}</guid>"
+        f"<pubDate>{formatdate(mtime, usegmt=True)}</pubDate></item>"
+        for url, page_title, mtime in recent
+    ]
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<rss version="2.0"><channel>'
+        f"<title>{escape_text(title)}</title>"
+        f"<link>{escape_text(base_url + '/')}</link>"
+        f"<description>{escape_text(title)}</description>"
+        f"<lastBuildDate>{updated}</lastBuildDate>"
+        + "".join(items)
+        + "</channel></rss>\n"
+    )
+
+
+def section_url(section: str) -> str:
+    # "blog", "/blog" and "/blog/" all name the "/blog/" section
+    section = section.strip("/")
+    return f"/{section}/" if section else "/"
+
+
+def archive_url(section: str, number: int) -> str:
+    # "/blog/" -> "/blog/archive/", "/blog/archive/page/2/", ...
+    if number == 1:
+        return f"{section}archive/"
+    return f"{section}archive/page/{number}/"
+
+
+def listing_html(
+    template: List[str],
+    heading: str,
+    entries: List[Tuple[str, str]],
+    minify: bool = False,
+    nav: List[Tuple[str, str]] = (),
+    fragments: Dict[str, str] = None,
+) -> str:
+    listing = ParentNode(
+        "ul",
+        [
+            ParentNode("li", [LeafNode("a", entry_title, {"href": url})])
+            for url, entry_title in entries
+        ],
+    )
+    children = [LeafNode("h1", heading), listing]
+    if nav:
+        # previous/next links between the pages of an archive
+        children.append(
+            ParentNode(
+                "nav", [LeafNode("a", label, {"href": url}) for url, label in nav]
+            )
+        )
+    content = ParentNode("div", children)
+    return render_template(
+        template,
+        {
+            **(fragments or {}),
+            "Title": escape_text(heading),
+            "Content": content.to_html(minify),
+        },
+    )
+
+
+# Metadata for every page in the build, filled in by generate_pages_recursive
+# as pages come back from rendering. Only (url, title, mtime) and the page's
+# tags are kept, so the site-wide outputs cost O(pages) memory and need no
+# second walk.
+class SiteIndex:
+    def __init__(self):
+        self.pages: List[Tuple[str, str, float]] = []
+        self.tags: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+
+    def add(self, url: str, title: str, mtime: float, tags: Tuple[str, ...] = ()):
+        self.pages.append((url, title, mtime))
+        for tag in tags:
+            self.tags[tag].append((url, title))
+
+    def tag_pages(self) -> Dict[str, Tuple[str, List[Tuple[str, str]]]]:
+        # tag page url -> (heading, [(url, title)]), plus /tags/ listing them
+        pages = {}
+        tag_list = []
+        for tag, entries in sorted(self.tags.items()):
+            url = f"/tags/{tag_slug(tag)}/"
+            if url in pages:
+                # tags differing only in case or punctuation share a page
+                pages[url][1].extend(entries)
+                pages[url][1].sort()
+                continue
+            pages[url] = (f"Tagged {tag}", sorted(entries))
+            tag_list.append((url, tag))
+        if tag_list:
+            pages["/tags/"] = ("Tags", tag_list)
+        return pages
+
+    def listings(self) -> Dict[str, List[Tuple[str, str]]]:
+        # directory url -> [(url, title)] for each directory with no page of
+        # its own, listing the pages and subdirectories directly inside it
+        page_urls = {url for url, _, _ in self.pages}
+        children: Dict[str, Set[Tuple[str, str]]] = defaultdict(set)
+        for url, title, _ in self.pages:
+            child, parent = (url, title), parent_url(url)
+            while parent:
+                children[parent].add(child)
+                if parent in page_urls:
+                    break
+                name = parent.strip("/").split("/")[-1]
+                child, parent = (parent, name), parent_url(parent)
+
+        return {
+            directory: sorted(entries)
+            for directory, entries in children.items()
+            if directory not in page_urls
+        }
+
+    def archive_pages(
+        self, section: str, per_page: int
+    ) -> Iterator[Tuple[str, str, List[Tuple[str, str]], List[Tuple[str, str]]]]:
+        # (url, heading, entries, nav) for each page of the archive of every
+        # page below the section url, newest first. Pages are built one at a
+        # time from the metadata, so only the page being filled holds entries.
+        # A section with no pages below it gets no archive.
+        posts = sorted(
+            (
+                page
+                for page in self.pages
+                if page[0].startswith(section) and page[0] != section
+            ),
+            key=lambda page: (-page[2], page[0]),
+        )
+        count = -(-len(posts) // per_page)
+        posts = iter(posts)
+        for number in range(1, count + 1):
+            nav = []
+            if number > 1:
+                nav.append((archive_url(section, number - 1), "Newer"))
+            if number < count:
+                nav.append((archive_url(section, number + 1), "Older"))
+            entries = [(url, title) for url, title, _ in islice(posts, per_page)]
+            heading = f"Archive of {section}"
+            if count > 1:
+                heading += f" ({number}/{count})"
+            yield archive_url(section, number), heading, entries, nav
+
+    def write(
+        self,
+        public_dir: str,
+        template_path: str,
+        base_url: str,
+        title: str = None,
+        feed_items: int = 20,
+        minify: bool = False,
+        archives: Sequence[str] = (),
+        per_page: int = 20,
+        images: Dict[str, Dict[str, str]] = None,
+    ) -> None:
+        self.pages.sort()
+        base_url = base_url.rstrip("/")
+        if title is None:
+            title = next((page[1] for page in self.pages if page[0] == "/"), "")
+
+        with open_output(os.path.join(public_dir, "sitemap.xml")) as sitemap:
+            sitemap.write(sitemap_xml(self.pages, base_url))
+
+        with open_output(os.path.join(public_dir, "rss.xml")) as feed:
+            feed.write(rss_xml(self.pages, base_url, title, feed_items))
+
+        template = load_template(template_path, minify)
+        # rendered once and shared by every listing
+        fragment_dir = os.path.join(os.path.dirname(template_path), FRAGMENT_DIR)
+        fragments = fragment_values(fragment_dir, template, minify, images)
+        generated = {
+            directory: (f"Index of {directory}", entries)
+            for directory, entries in self.listings().items()
+        }
+        # a content page at the same url always wins over a tag page
+        page_urls = {url for url, _, _ in self.pages}
+        for url, tag_page in self.tag_pages().items():
+            if url not in page_urls:
+                generated[url] = tag_page
+
+        for url, (heading, entries) in sorted(generated.items()):
+            html = listing_html(template, heading, entries, minify, (), fragments)
+            write_listing(public_dir, url, html)
+
+        # each archive page is written as soon as it is filled
+        for section in map(section_url, archives):
+            for url, heading, entries, nav in self.archive_pages(section, per_page):
+                if url not in page_urls:
+                    html = listing_html(
+                        template, heading, entries, minify, nav, fragments
+                    )
+                    write_listing(public_dir, url, html)
@@ -0,0 +1,167 @@
+import argparse
+import gc
+import os
+import tempfile
+import time
+
+from cache import ParseCache
+from config import CONTENT_DIR
+from escape import escape_attr, escape_text
+import generate
+from generate import LeafNode, ParentNode, markdown_to_html_node, static_node
+from parse import parse_markdown
+
+
+def sample_markdown() -> str:
+    with open(os.path.join(CONTENT_DIR, "majesty", "index.md")) as markdown_file:
+        return markdown_file.read()
+
+
+def time_render(trees) -> float:
+    start = time.perf_counter()
+    for tree in trees:
+        tree.to_html()
+    return time.perf_counter() - start
+
+
+def bench_escape(pages: int) -> None:
+    markdown = sample_markdown()
+    start = time.perf_counter()
+    trees = [markdown_to_html_node(markdown) for _ in range(pages)]
+    parse = time.perf_counter() - start
+
+    # alternate runs so machine noise hits both variants equally; identity
+    # escapers give the cost of serialization without the escaping layer
+    escaped, unescaped = [], []
+    gc.disable()
+    try:
+        for _ in range(15):
+            escaped.append(time_render(trees))
+            generate.escape_text = generate.escape_attr = str
+            unescaped.append(time_render(trees))
+            generate.escape_text, generate.escape_attr = escape_text, escape_attr
+    finally:
+        generate.escape_text, generate.escape_attr = escape_text, escape_attr
+        gc.enable()
+
+    print(f"pages:      {pages}")
+    print(f"unescaped:  {min(unescaped) * 1000:.1f} ms")
+    print(f"escaped:    {min(escaped) * 1000:.1f} ms")
+    overhead = min(escaped) - min(unescaped)
+    print(f"overhead:   {overhead / min(unescaped):.1%} of serialization")
+    print(f"            {overhead / (parse + min(escaped)):.1%} of parse + render")
+
+
+def bench_parse_cache(pages: int) -> None:
+    # vary each page so every parse gets its own cache entry
+    base = sample_markdown()
+    documents = [f"{base}\n\nPage {page}" for page in range(pages)]
+
+    start = time.perf_counter()
+    for markdown in documents:
+        parse_markdown(markdown)
+    parse = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ParseCache(cache_dir)
+        start = time.perf_counter()
+        for markdown in documents:
+            cache.parse(markdown)
+        cold = time.perf_counter() - start
+
+        cache = ParseCache(cache_dir)
+        start = time.perf_counter()
+        for markdown in documents:
+            cache.parse(markdown)
+        warm = time.perf_counter() - start
+
+    print(f"pages:       {pages}")
+    print(f"parse:       {parse * 1000:.1f} ms")
+    print(f"cold cache:  {cold * 1000:.1f} ms (parse + write)")
+    print(f"warm cache:  {warm * 1000:.1f} ms ({parse / warm:.1f}x faster than parse)")
+
+
+NESTED_MARKDOWN = """- item with **bold** text
+  - nested item
+    1. deep item
+
+       with a second paragraph
+  - ```
+    code in a list
+    ```
+10. tenth
+11. eleventh
+
+"""
+
+
+def bench_blocks(pages: int) -> None:
+    # documents of 1x to 8x the sample page plus nested lists; the parser
+    # makes one pass over the lines, so time per line should stay flat
+    base = sample_markdown() + "\n\n" + NESTED_MARKDOWN * 20
+    print(f"pages:  {pages}")
+    for scale in (1, 2, 4, 8):
+        markdown = "\n\n".join([base] * scale)
+        lines = markdown.count("\n") + 1
+        runs = max(pages // scale, 1)
+        start = time.perf_counter()
+        for _ in range(runs):
+            parse_markdown(markdown)
+        seconds = (time.perf_counter() - start) / runs
+        print(
+            f"{scale}x: {lines:6} lines, {seconds * 1000:7.2f} ms/doc,"
+            f" {seconds / lines * 1e6:.2f} us/line"
+        )
+
+
+def navigation(links: int) -> ParentNode:
+    return ParentNode(
+        "nav",
+        [
+            ParentNode(
+                "ul",
+                [
+                    ParentNode(
+                        "li", [LeafNode("a", f"Section {link}", {"href": f"/{link}/"})]
+                    )
+                    for link in range(links)
+                ],
+            )
+        ],
+    )
+
+
+def bench_fragments(pages: int) -> None:
+    # a 50 link navigation tree built and serialized on every page vs
+    # serialized once and reused as a RawNode
+    start = time.perf_counter()
+    for _ in range(pages):
+        navigation(50).to_html()
+    fresh = time.perf_counter() - start
+
+    start = time.perf_counter()
+    nav = static_node(navigation(50))
+    for _ in range(pages):
+        nav.to_html()
+    static = time.perf_counter() - start
+
+    print(f"pages:   {pages}")
+    print(f"fresh:   {fresh * 1000:.1f} ms")
+    print(f"static:  {static * 1000:.1f} ms ({fresh / static:.0f}x faster)")
+
+
+BENCHMARKS = {
+    "escape": bench_escape,
+    "parse-cache": bench_parse_cache,
+    "blocks": bench_blocks,
+    "fragments": bench_fragments,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Static site generator benchmarks")
+    parser.add_argument("benchmark", choices=BENCHMARKS)
+    parser.add_argument("--pages", type=int, default=2000)
+    args = parser.parse_args()
+
+    BENCHMARKS[args.benchmark](args.pages)
@@ -0,0 +1,114 @@
+import hashlib
+import marshal
+import os
+import shutil
+from typing import Any, List, Tuple
+
+from config import BlockType, TextType
+from parse import PARSER_VERSION, TextNode, parse_markdown
+
+
+# dict lookups are much cheaper than calling the enum constructors on load
+TEXT_TYPES = {str(text_type): text_type for text_type in TextType}
+BLOCK_TYPES = {str(block_type): block_type for block_type in BlockType}
+
+
+def encode(value: Any) -> Any:
+    # marshal only handles builtins: TextNodes become tuples and every
+    # other container becomes a list, so the two can't be confused on load
+    if isinstance(value, TextNode):
+        return (value.text, str(value.text_type), value.url)
+    if isinstance(value, (list, tuple)):
+        return [encode(item) for item in value]
+    return value
+
+
+def decode(value: Any) -> Any:
+    if isinstance(value, tuple):
+        text, text_type, url = value
+        return TextNode(text, TEXT_TYPES[text_type], url)
+    if isinstance(value, list):
+        return [decode(item) for item in value]
+    return value
+
+
+def encode_content(block_type: BlockType, content: Any) -> Any:
+    # list items hold blocks of their own, whose types must survive the trip
+    if block_type == BlockType.UNORDERED:
+        return [encode_block_list(item) for item in content]
+    if block_type == BlockType.ORDERED:
+        start, items = content
+        return [start, [encode_block_list(item) for item in items]]
+    return encode(content)
+
+
+def decode_content(block_type: BlockType, content: Any) -> Any:
+    if block_type == BlockType.UNORDERED:
+        return [decode_block_list(item) for item in content]
+    if block_type == BlockType.ORDERED:
+        start, items = content
+        return (start, [decode_block_list(item) for item in items])
+    return decode(content)
+
+
+def encode_block_list(blocks: List[Tuple[BlockType, Any]]) -> list:
+    return [
+        [str(block_type), encode_content(block_type, content)]
+        for block_type, content in blocks
+    ]
+
+
+def decode_block_list(encoded: list) -> List[Tuple[BlockType, Any]]:
+    blocks = []
+    for block_type, content in encoded:
+        block_type = BLOCK_TYPES[block_type]
+        blocks.append((block_type, decode_content(block_type, content)))
+    return blocks
+
+
+def encode_blocks(blocks: List[Tuple[BlockType, Any]]) -> bytes:
+    return marshal.dumps(encode_block_list(blocks))
+
+
+def decode_blocks(data: bytes) -> List[Tuple[BlockType, Any]]:
+    return decode_block_list(marshal.loads(data))
+
+
+# Parsed blocks keyed by a hash of the markdown source. Entries live under a
+# directory named for PARSER_VERSION and directories for other versions are
+# removed on open, so a parser change invalidates the whole cache at once.
+class ParseCache:
+    def __init__(self, cache_dir: str):
+        root = os.path.join(cache_dir, "ast")
+        self.dir = os.path.join(root, f"v{PARSER_VERSION}")
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(self.dir, exist_ok=True)
+        for entry in os.listdir(root):
+            if entry != f"v{PARSER_VERSION}":
+                shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+
+    def path(self, markdown: str) -> str:
+        digest = hashlib.sha256(markdown.encode()).hexdigest()
+        return os.path.join(self.dir, digest[:2], digest[2:])
+
+    def parse(self, markdown: str) -> List[Tuple[BlockType, Any]]:
+        path = self.path(markdown)
+        try:
+            with open(path, "rb") as cached:
+                blocks = decode_blocks(cached.read())
+            self.hits += 1
+            return blocks
+        except (OSError, EOFError, ValueError, TypeError, KeyError):
+            pass
+
+        self.misses += 1
+        blocks = parse_markdown(markdown)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as cached:
+            cached.write(encode_blocks(blocks))
+        os.replace(tmp_path, path)
+        return blocks
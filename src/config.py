@@ -7,6 +7,9 @@ CONTENT_DIR = os.path.join(BASE_DIR, "content")
 PUBLIC_DIR = os.path.join(BASE_DIR, "public")
 STATIC_DIR = os.path.join(BASE_DIR, "static")
 TEMPLATE_FILE = os.path.join(BASE_DIR, "template.html")
+CACHE_DIR = os.path.join(BASE_DIR, ".cache")
+METRICS_DIR = os.path.join(BASE_DIR, ".metrics")
+BASE_URL = "http://localhost:8888"
 
 
 class TextType(StrEnum):
@@ -25,3 +28,4 @@ class BlockType(StrEnum):
     QUOTE = "quote"
     UNORDERED = "unordered_list"
     ORDERED = "ordered_list"
+    THEMATIC_BREAK = "thematic_break"
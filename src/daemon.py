@@ -0,0 +1,56 @@
+import json
+import os
+import signal
+import socketserver
+import sys
+import time
+import traceback
+from typing import Dict
+
+from main import run_build
+
+
+class BuildHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+
+        start = time.perf_counter()
+        try:
+            run_build(**json.loads(line))
+            response = {"ok": True, "seconds": time.perf_counter() - start}
+        except Exception as error:
+            traceback.print_exc()
+            response = {"ok": False, "error": f"{type(error).__name__}: {error}"}
+
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+# Builds (single or multi-site) are handled one at a time in this process, so
+# templates compiled by generate.load_template and any other module-level
+# caches stay warm across requests instead of being rebuilt by a fresh
+# interpreter for every build.
+def serve(socket_path: str) -> None:
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    with socketserver.UnixStreamServer(socket_path, BuildHandler) as server:
+        print(f"Build daemon listening on {socket_path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.remove(socket_path)
+
+
+def request_build(socket_path: str, **paths: str) -> Dict:
+    import socket
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall(json.dumps(paths).encode() + b"\n")
+        with client.makefile("rb") as response:
+            return json.loads(response.readline())
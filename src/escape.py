@@ -0,0 +1,17 @@
+def escape_text(text: str) -> str:
+    # substring checks are memchr scans, far cheaper than a regex search, so
+    # the common case of plain prose returns without building a new string
+    if "&" not in text and "<" not in text and ">" not in text:
+        return text
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def escape_attr(value: str) -> str:
+    if "&" not in value and "<" not in value and ">" not in value and '"' not in value:
+        return value
+    return (
+        value.replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace(">", "&gt;")
+        .replace('"', "&quot;")
+    )
@@ -0,0 +1,42 @@
+import os
+import tempfile
+import unittest
+from typing import Union
+
+TEMPLATE = "<title>{{ Title }}</title>{{ Content }}"
+
+
+# A scratch project laid out like this repository, under self.root: content/,
+# static/ and template.html, with self.paths holding the directories build()
+# and run_build() take. Tests add their own pages and static files.
+class SiteTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = self.tmp.name
+        self.paths = {
+            "content_dir": os.path.join(self.root, "content"),
+            "template_path": os.path.join(self.root, "template.html"),
+            "public_dir": os.path.join(self.root, "public"),
+            "static_dir": os.path.join(self.root, "static"),
+            "cache_dir": os.path.join(self.root, "cache"),
+            "metrics_dir": os.path.join(self.root, "metrics"),
+        }
+        os.makedirs(self.paths["content_dir"])
+        os.makedirs(self.paths["static_dir"])
+        self.write_template(TEMPLATE)
+
+    def write_file(self, path: str, data: Union[str, bytes]) -> str:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb" if isinstance(data, bytes) else "w") as output:
+            output.write(data)
+        return path
+
+    def write_page(self, name: str, markdown: str) -> str:
+        return self.write_file(os.path.join(self.paths["content_dir"], name), markdown)
+
+    def write_static(self, name: str, data: Union[str, bytes]) -> str:
+        return self.write_file(os.path.join(self.paths["static_dir"], name), data)
+
+    def write_template(self, template: str) -> str:
+        return self.write_file(self.paths["template_path"], template)
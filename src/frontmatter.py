@@ -0,0 +1,125 @@
+import datetime
+import io
+from typing import Any, Dict, NamedTuple, Optional, TextIO, Tuple
+
+# opening/closing line -> key/value separator: "---" for YAML-style front
+# matter (title: Post), "+++" for TOML-style (title = "Post")
+DELIMITERS = {"---": ":", "+++": "="}
+
+
+class Metadata(NamedTuple):
+    title: Optional[str] = None
+    date: Optional[str] = None
+    draft: bool = False
+    template: Optional[str] = None
+    tags: Tuple[str, ...] = ()
+
+
+def parse_value(value: str) -> Any:
+    # the subset both formats share: quoted or bare strings, booleans and
+    # flat [a, b] lists; dates are kept as strings
+    value = value.strip()
+    if value.startswith("[") and value.endswith("]"):
+        return [parse_value(item) for item in value[1:-1].split(",") if item.strip()]
+    if len(value) > 1 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    if value in ("true", "false"):
+        return value == "true"
+    return value
+
+
+def parse_fields(lines: list, separator: str) -> Dict[str, Any]:
+    fields = {}
+    key = None
+    for line in lines:
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        if separator == ":" and stripped.startswith("- ") and key is not None:
+            # YAML block list item under the previous key
+            if not isinstance(fields[key], list):
+                fields[key] = []
+            fields[key].append(parse_value(stripped[2:]))
+            continue
+        key, found, value = stripped.partition(separator)
+        if not found:
+            raise ValueError(f"Invalid front matter line: {stripped}")
+        key = key.strip()
+        fields[key] = parse_value(value) if value.strip() else []
+    return fields
+
+
+def to_metadata(fields: Dict[str, Any]) -> Metadata:
+    tags = fields.get("tags", [])
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    title = fields.get("title")
+    date = fields.get("date")
+    template = fields.get("template")
+    if date:
+        try:
+            date_timestamp(str(date))
+        except ValueError:
+            raise ValueError(f"Invalid date '{date}', expected ISO 8601") from None
+    return Metadata(
+        str(title) if title else None,
+        str(date) if date else None,
+        fields.get("draft") is True,
+        str(template) if template else None,
+        tuple(str(tag).strip() for tag in tags if str(tag).strip()),
+    )
+
+
+def read_front_matter(file: TextIO) -> Tuple[Optional[Dict[str, Any]], str]:
+    # consumes the front matter block, if there is one, and any blank lines
+    # after it; returns the fields (None without front matter) and the first
+    # line of the body, which has already been read from the file. An opening
+    # line that is never closed is a thematic break, not front matter.
+    first = file.readline()
+    delimiter = first.strip()
+    if delimiter not in DELIMITERS:
+        return None, first
+    lines = []
+    for line in file:
+        if line.strip() == delimiter:
+            fields = parse_fields(lines, DELIMITERS[delimiter])
+            line = file.readline()
+            while line == "\n":
+                line = file.readline()
+            return fields, line
+        lines.append(line)
+    return None, first
+
+
+def split_front_matter(markdown: str) -> Tuple[Metadata, str]:
+    if not markdown.startswith(tuple(DELIMITERS)):
+        return Metadata(), markdown
+    file = io.StringIO(markdown)
+    fields, first = read_front_matter(file)
+    if fields is None:
+        return Metadata(), markdown
+    return to_metadata(fields), first + file.read()
+
+
+def scan_metadata(path: str) -> Metadata:
+    # reads the front matter and, when it has no title, the first line of the
+    # body for its h1; never the rest of the document
+    try:
+        with open(path) as file:
+            fields, first = read_front_matter(file)
+        metadata = to_metadata(fields or {})
+    except ValueError as error:
+        raise ValueError(f"{path}: {error}") from error
+    first = first.rstrip("\n")
+    if metadata.title is None and first.startswith("# ") and len(first) > 2:
+        # same title extract_title would find
+        metadata = metadata._replace(title=first.strip("# "))
+    return metadata
+
+
+def date_timestamp(date: str) -> float:
+    # "2024-05-01" or a full ISO 8601 datetime; naive values are UTC
+    parsed = datetime.datetime.fromisoformat(date)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed.timestamp()
@@ -1,9 +1,149 @@
 import os
 import re
-from typing import Dict, List, Self
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Self,
+    TextIO,
+    Tuple,
+)
 
 from config import BlockType, TextType
-from parse import block_to_block_type, markdown_to_blocks, text_to_textnodes, TextNode
+from escape import escape_attr, escape_text
+from frontmatter import date_timestamp, scan_metadata, split_front_matter
+from highlight import CSS_CLASS as HIGHLIGHT_CLASS
+from search import page_terms
+from shard import shard_of
+from parse import (
+    TextNode,
+    parse_code,
+    parse_heading,
+    parse_markdown,
+    parse_ordered,
+    parse_paragraph,
+    parse_quote,
+    parse_unordered,
+)
+
+
+WHITESPACE_RE = re.compile(r"\s+")
+# a whitespace run spanning a line break; between two block-level tags (or a
+# block-level tag and the start or end of the document) it is only
+# indentation and is dropped, anywhere else it shows as one space
+FORMATTING_RE = re.compile(r"\s*\n\s*")
+TAG_NAME_RE = re.compile(r"</?([a-zA-Z][\w-]*|!)")
+# tags whose surrounding whitespace is never rendered; "!" is a doctype or
+# comment
+BLOCK_TAGS = frozenset(
+    (
+        "!",
+        "address",
+        "article",
+        "aside",
+        "blockquote",
+        "body",
+        "dd",
+        "details",
+        "dialog",
+        "div",
+        "dl",
+        "dt",
+        "fieldset",
+        "figcaption",
+        "figure",
+        "footer",
+        "form",
+        "h1",
+        "h2",
+        "h3",
+        "h4",
+        "h5",
+        "h6",
+        "head",
+        "header",
+        "hgroup",
+        "hr",
+        "html",
+        "li",
+        "link",
+        "main",
+        "meta",
+        "nav",
+        "ol",
+        "p",
+        "pre",
+        "script",
+        "section",
+        "style",
+        "summary",
+        "table",
+        "tbody",
+        "td",
+        "tfoot",
+        "th",
+        "thead",
+        "title",
+        "tr",
+        "ul",
+    )
+)
+# elements whose whitespace is significant or that aren't HTML
+PRESERVED_RE = re.compile(r"<(pre|textarea|script|style)\b.*?</\1\s*>", re.I | re.S)
+
+
+def collapse_whitespace(text: str) -> str:
+    if "  " not in text and "\n" not in text and "\t" not in text:
+        return text
+    return WHITESPACE_RE.sub(" ", text)
+
+
+def is_block_edge(markup: str, start: int, end: int) -> bool:
+    # True when the whitespace at markup[start:end] sits between two
+    # block-level tags or a block-level tag and the document's edge
+    if start > 0:
+        if markup[start - 1] != ">":
+            return False
+        tag = TAG_NAME_RE.match(markup, markup.rfind("<", 0, start))
+        if not tag or tag.group(1).lower() not in BLOCK_TAGS:
+            return False
+    if end < len(markup):
+        tag = TAG_NAME_RE.match(markup, end)
+        if not tag or tag.group(1).lower() not in BLOCK_TAGS:
+            return False
+    return True
+
+
+def minify_chunk(chunk: str, before: str = "", after: str = "") -> str:
+    # before/after are the tags of the preserved elements around the chunk,
+    # so whitespace next to them is judged like any other
+    markup = before + chunk + after
+    minified = collapse_whitespace(
+        FORMATTING_RE.sub(
+            lambda run: "" if is_block_edge(markup, *run.span()) else " ", markup
+        )
+    )
+    return minified[len(before) : len(minified) - len(after)]
+
+
+def minify_markup(html: str) -> str:
+    parts = []
+    position = 0
+    before = ""
+    for match in PRESERVED_RE.finditer(html):
+        after = f"<{match.group(1)}>"
+        parts.append(minify_chunk(html[position : match.start()], before, after))
+        parts.append(match.group(0))
+        position = match.end()
+        before = f"</{match.group(1)}>"
+    parts.append(minify_chunk(html[position:], before))
+    return "".join(parts)
 
 
 class HTMLNode:
@@ -30,29 +170,39 @@ class HTMLNode:
     def __repr__(self):
         return f'{self.__class__.__qualname__}(tag="{self.tag}", value="{self.value}", children={self.children}, props={self.props})'
 
-    def to_html(self):
+    def to_html(self, minify: bool = False):
         raise NotImplementedError
 
     def props_to_html(self):
         return (
-            "".join([f' {key}="{value}"' for key, value in self.props.items()])
+            "".join(
+                [
+                    f' {key}="{escape_attr(value)}"'
+                    for key, value in self.props.items()
+                ]
+            )
             if self.props
             else ""
         )
 
 
+# elements with no content or closing tag
+VOID_TAGS = frozenset(("hr", "img"))
+
+
 class LeafNode(HTMLNode):
     def __init__(self, tag: str = None, value: str = "", props: Dict[str, str] = None):
         super().__init__(tag=tag, value=value, props=props, children=None)
 
-    def to_html(self):
-        if self.tag == "img":
+    def to_html(self, minify: bool = False):
+        if self.tag in VOID_TAGS:
             return f"<{self.tag}{self.props_to_html()}>"
         if not self.value:
             raise ValueError("All nodes require a value")
+        value = escape_text(collapse_whitespace(self.value) if minify else self.value)
         if self.tag:
-            return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
-        return self.value
+            return f"<{self.tag}{self.props_to_html()}>{value}</{self.tag}>"
+        return value
 
 
 class ParentNode(HTMLNode):
@@ -61,17 +211,30 @@ class ParentNode(HTMLNode):
     ):
         super().__init__(tag=tag, children=children, props=props)
 
-    def to_html(self):
+    def to_html(self, minify: bool = False):
         if not self.tag:
             raise ValueError("ParentNode requires a 'tag'")
         if not self.children:
             raise ValueError("ParentNode requires 'children'")
 
-        inner_html = "".join([node.to_html() for node in self.children])
+        # whitespace inside <pre> (code blocks) is content, never minified
+        minify = minify and self.tag != "pre"
+        inner_html = "".join([node.to_html(minify) for node in self.children])
 
         return f"<{self.tag}{self.props_to_html()}>{inner_html}</{self.tag}>"
 
 
+# Markup that is already serialized, e.g. highlighted code. `text` is the
+# plain text it represents, used where the page's words are needed.
+class RawNode(HTMLNode):
+    def __init__(self, value: str, text: str = ""):
+        super().__init__(value=value)
+        self.text = text
+
+    def to_html(self, minify: bool = False):
+        return self.value
+
+
 def text_node_to_html_node(text_node: TextNode) -> LeafNode:
     if text_node.text_type == TextType.TEXT:
         return LeafNode(None, text_node.text)
@@ -89,76 +252,143 @@ def text_node_to_html_node(text_node: TextNode) -> LeafNode:
         raise ValueError("Unknown node type")
 
 
-def quote_to_html(block: str) -> ParentNode:
-    text = " ".join([line.lstrip("> ") for line in block.split("\n")])
-    text_nodes = text_to_textnodes(text)
-    children = [text_node_to_html_node(node) for node in text_nodes]
-    return ParentNode("blockquote", children)
+def text_nodes_to_html(text_nodes: List[TextNode]) -> List[LeafNode]:
+    return [text_node_to_html_node(node) for node in text_nodes]
 
 
-def unordered_to_html(block: str) -> ParentNode:
-    items = [line[2:] for line in block.split("\n")]
-    children = []
-    for item in items:
-        text_nodes = text_to_textnodes(item)
-        html_nodes = [text_node_to_html_node(node) for node in text_nodes]
-        children.append(ParentNode("li", html_nodes))
-    return ParentNode("ul", children)
+def render_quote(text_nodes: List[TextNode]) -> ParentNode:
+    return ParentNode("blockquote", text_nodes_to_html(text_nodes))
 
 
-def ordered_to_html(block: str) -> ParentNode:
-    items = [line[3:] for line in block.split("\n")]
+def render_list_item(
+    blocks: List[Tuple[BlockType, Any]], highlighter=None
+) -> ParentNode:
+    # an item with a single paragraph keeps its text inline, as in a tight
+    # list; with several paragraphs each one gets its own <p>
+    paragraphs = sum(block_type == BlockType.PARAGRAPH for block_type, _ in blocks)
     children = []
-    for item in items:
-        text_nodes = text_to_textnodes(item)
-        html_nodes = [text_node_to_html_node(node) for node in text_nodes]
-        children.append(ParentNode("li", html_nodes))
-    return ParentNode("ol", children)
+    for block_type, content in blocks:
+        if block_type == BlockType.PARAGRAPH and paragraphs == 1:
+            children.extend(text_nodes_to_html(content))
+        elif block_type == BlockType.PARAGRAPH:
+            children.append(ParentNode("p", text_nodes_to_html(content)))
+        else:
+            children.append(render_block(block_type, content, highlighter))
+    return ParentNode("li", children)
 
 
-def code_to_html(block: str) -> ParentNode:
-    code = LeafNode(None, block.strip("```"))
-    return ParentNode("pre", [ParentNode("code", [code])])
+def render_unordered(
+    items: List[List[Tuple[BlockType, Any]]], highlighter=None
+) -> ParentNode:
+    return ParentNode("ul", [render_list_item(item, highlighter) for item in items])
 
 
-def heading_to_html(block: str) -> ParentNode:
-    parts = block.split(" ", 1)
-    level = len(parts[0])
-    text = parts[1]
-    text_nodes = text_to_textnodes(text)
-    children = [text_node_to_html_node(node) for node in text_nodes]
-    return ParentNode(f"h{level}", children)
+def render_ordered(
+    ordered: Tuple[int, List[List[Tuple[BlockType, Any]]]], highlighter=None
+) -> ParentNode:
+    start, items = ordered
+    return ParentNode(
+        "ol",
+        [render_list_item(item, highlighter) for item in items],
+        {"start": str(start)} if start != 1 else None,
+    )
 
 
-def paragraph_to_html(block: str) -> ParentNode:
-    paragraph_nodes = text_to_textnodes(block)
+def render_code(code_block: Tuple[str, str], highlighter=None) -> ParentNode:
+    language, code = code_block
+    if not language:
+        return ParentNode("pre", [ParentNode("code", [LeafNode(None, code)])])
 
+    code_props = {"class": f"language-{language}"}
+    highlighted = highlighter(code, language) if highlighter else None
+    if highlighted is None:
+        return ParentNode(
+            "pre", [ParentNode("code", [LeafNode(None, code)], code_props)]
+        )
+    return ParentNode(
+        "pre",
+        [ParentNode("code", [RawNode(highlighted, code)], code_props)],
+        {"class": HIGHLIGHT_CLASS},
+    )
+
+
+def render_heading(heading: Tuple[int, List[TextNode]]) -> ParentNode:
+    level, text_nodes = heading
+    return ParentNode(f"h{level}", text_nodes_to_html(text_nodes))
+
+
+def render_thematic_break(_: None) -> LeafNode:
+    return LeafNode("hr", None)
+
+
+def render_paragraph(paragraph_nodes: List[TextNode]) -> HTMLNode:
     if len(paragraph_nodes) == 1:
         if paragraph_nodes[0].text_type == TextType.TEXT:
             return LeafNode("p", paragraph_nodes[0].text)
         return text_node_to_html_node(paragraph_nodes[0])
 
-    return ParentNode("p", [text_node_to_html_node(node) for node in paragraph_nodes])
+    return ParentNode("p", text_nodes_to_html(paragraph_nodes))
+
+
+BLOCK_RENDERERS = {
+    BlockType.QUOTE: render_quote,
+    BlockType.UNORDERED: render_unordered,
+    BlockType.ORDERED: render_ordered,
+    BlockType.CODE: render_code,
+    BlockType.HEADING: render_heading,
+    BlockType.PARAGRAPH: render_paragraph,
+    BlockType.THEMATIC_BREAK: render_thematic_break,
+}
+
+
+# blocks that can contain code take the highlighter too
+HIGHLIGHTED_BLOCKS = {BlockType.CODE, BlockType.UNORDERED, BlockType.ORDERED}
+
+
+def render_block(block_type: BlockType, content: Any, highlighter=None) -> HTMLNode:
+    if block_type in HIGHLIGHTED_BLOCKS:
+        return BLOCK_RENDERERS[block_type](content, highlighter)
+    return BLOCK_RENDERERS[block_type](content)
+
+
+def render_blocks(
+    blocks: List[Tuple[BlockType, Any]], highlighter=None
+) -> ParentNode:
+    return ParentNode(
+        "div",
+        [
+            render_block(block_type, content, highlighter)
+            for block_type, content in blocks
+        ],
+    )
+
+
+def quote_to_html(block: str) -> ParentNode:
+    return render_quote(parse_quote(block))
+
+
+def unordered_to_html(block: str) -> ParentNode:
+    return render_unordered(parse_unordered(block))
+
+
+def ordered_to_html(block: str) -> ParentNode:
+    return render_ordered(parse_ordered(block))
+
+
+def code_to_html(block: str) -> ParentNode:
+    return render_code(parse_code(block))
+
+
+def heading_to_html(block: str) -> ParentNode:
+    return render_heading(parse_heading(block))
+
+
+def paragraph_to_html(block: str) -> HTMLNode:
+    return render_paragraph(parse_paragraph(block))
 
 
 def markdown_to_html_node(markdown: str) -> ParentNode:
-    nodes = []
-    blocks = markdown_to_blocks(markdown)
-    for block in blocks:
-        block_type = block_to_block_type(block)
-        if block_type == BlockType.QUOTE:
-            nodes.append(quote_to_html(block))
-        if block_type == BlockType.UNORDERED:
-            nodes.append(unordered_to_html(block))
-        if block_type == BlockType.ORDERED:
-            nodes.append(ordered_to_html(block))
-        if block_type == BlockType.CODE:
-            nodes.append(code_to_html(block))
-        if block_type == BlockType.HEADING:
-            nodes.append(heading_to_html(block))
-        if block_type == BlockType.PARAGRAPH:
-            nodes.append(paragraph_to_html(block))
-    return ParentNode("div", nodes)
+    return render_blocks(parse_markdown(markdown))
 
 
 def extract_title(markdown: str) -> str:
@@ -168,39 +398,393 @@ def extract_title(markdown: str) -> str:
     return heading.group(0).strip("# ")
 
 
-def generate_page(from_path: str, template_path: str, dest_path: str) -> None:
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+PLACEHOLDER_RE = re.compile(r"\{\{ (\w+) \}\}")
+# markdown fragments (navigation, footers, callouts), beside the template
+FRAGMENT_DIR = "fragments"
 
-    with open(from_path) as markdown_file:
-        markdown = markdown_file.read()
+# (template path, minify) -> (mtime_ns, compiled template), kept for the life
+# of the process so a long-running build daemon only re-reads templates on
+# change
+_templates: Dict[Tuple[str, bool], Tuple[int, List[str]]] = {}
+
+
+def compile_template(template: str, minify: bool = False) -> List[str]:
+    # literal text at even indices, placeholder names at odd indices; with
+    # minify the literal text is minified here, once, not on every page
+    compiled = PLACEHOLDER_RE.split(template)
+    if minify:
+        compiled[::2] = [minify_markup(part) for part in compiled[::2]]
+    return compiled
 
-    with open(template_path) as template_file:
-        template = template_file.read()
 
-    title = extract_title(markdown)
-    html_content = markdown_to_html_node(markdown).to_html()
+def render_template(compiled: List[str], values: Dict[str, str]) -> str:
+    return "".join(
+        values.get(part, f"{{{{ {part} }}}}") if index % 2 else part
+        for index, part in enumerate(compiled)
+    )
+
+
+def load_template(template_path: str, minify: bool = False) -> List[str]:
+    mtime = os.stat(template_path).st_mtime_ns
+    cached = _templates.get((template_path, minify))
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with open(template_path) as template_file:
+        compiled = compile_template(template_file.read(), minify)
+    _templates[(template_path, minify)] = (mtime, compiled)
+    return compiled
+
+
+# (fragment path, minify) -> (mtime_ns, image srcs, their props, serialized
+# fragment); like templates, shared fragments are rendered once per process and
+# again only when the file or the props of its own images change
+_fragments: Dict[
+    Tuple[str, bool], Tuple[int, List[str], List[Dict[str, str]], RawNode]
+] = {}
+
+
+def static_node(node: HTMLNode, minify: bool = False) -> RawNode:
+    # a subtree that is the same on every page, serialized once and reused
+    return RawNode(node.to_html(minify), " ".join(node_text(node)))
+
+
+def image_srcs(node: HTMLNode) -> Iterator[str]:
+    if node.tag == "img" and node.props:
+        yield node.props.get("src")
+    for child in node.children or []:
+        yield from image_srcs(child)
+
+
+def image_props(
+    srcs: List[str], images: Dict[str, Dict[str, str]]
+) -> List[Dict[str, str]]:
+    # what add_image_props gives each of the srcs
+    if images is None:
+        return None
+    return [images.get(src) for src in srcs]
+
+
+def load_fragment(
+    fragment_path: str,
+    minify: bool = False,
+    images: Dict[str, Dict[str, str]] = None,
+) -> RawNode:
+    mtime = os.stat(fragment_path).st_mtime_ns
+    cached = _fragments.get((fragment_path, minify))
+    if cached and cached[0] == mtime and cached[2] == image_props(cached[1], images):
+        return cached[3]
+
+    with open(fragment_path) as fragment_file:
+        html_node = markdown_to_html_node(fragment_file.read())
+    srcs = list(image_srcs(html_node))
+    if images is not None:
+        add_image_props(html_node, images)
+    node = static_node(html_node, minify)
+    _fragments[(fragment_path, minify)] = (
+        mtime,
+        srcs,
+        image_props(srcs, images),
+        node,
+    )
+    return node
+
+
+def fragment_path(fragment_dir: str, name: str) -> str:
+    # "{{ Footer }}" -> <fragment_dir>/footer.md, None when there is none
+    path = os.path.join(fragment_dir, f"{name.lower()}.md")
+    return path if os.path.isfile(path) else None
+
+
+def fragment_values(
+    fragment_dir: str,
+    template: List[str],
+    minify: bool = False,
+    images: Dict[str, Dict[str, str]] = None,
+) -> Dict[str, str]:
+    # markup for every template placeholder with a fragment of that name
+    values = {}
+    for name in template[1::2]:
+        path = fragment_path(fragment_dir, name)
+        if path is not None:
+            values[name] = load_fragment(path, minify, images).value
+    return values
+
+
+def include_fragments(
+    node: ParentNode,
+    fragment_dir: str,
+    minify: bool,
+    images: Dict[str, Dict[str, str]] = None,
+) -> None:
+    # a top-level paragraph of just "{{ Name }}" is replaced by that fragment
+    for index, child in enumerate(node.children):
+        # plain text paragraphs render as a single <p> leaf
+        if child.tag != "p" or child.children is not None:
+            continue
+        placeholder = PLACEHOLDER_RE.fullmatch(child.value or "")
+        path = placeholder and fragment_path(fragment_dir, placeholder.group(1))
+        if path is not None:
+            node.children[index] = load_fragment(path, minify, images)
+
+
+def node_text(node: HTMLNode) -> Iterator[str]:
+    if isinstance(node, RawNode):
+        if node.text:
+            yield node.text
+        return
+    if node.value:
+        yield node.value
+    if node.props and "alt" in node.props:
+        yield node.props["alt"]
+    for child in node.children or []:
+        yield from node_text(child)
+
+
+def add_image_props(node: HTMLNode, images: Dict[str, Dict[str, str]]) -> None:
+    # images maps src -> extra props (intrinsic size, srcset); every image is
+    # lazy loaded, including ones the image stage knows nothing about
+    if node.tag == "img" and node.props:
+        extra = images.get(node.props.get("src"), {"loading": "lazy"})
+        node.props = {**node.props, **extra}
+    for child in node.children or []:
+        add_image_props(child, images)
+
+
+def page_url(public_dir: str, dest_path: str) -> str:
+    url = "/" + os.path.relpath(dest_path, public_dir).replace(os.sep, "/")
+    if url.endswith("/index.html"):
+        return url[: -len("index.html")]
+    return url
+
+
+class Page(NamedTuple):
+    source: str
+    dest: str
+    title: str
+    mtime: float
+    terms: List[str]
+    size: int = 0
+    seconds: float = 0.0
+    # cache name -> (hits, misses) while rendering this page; workers' caches
+    # never report back, so their counters travel with the page instead
+    cache_stats: Dict[str, Tuple[int, int]] = {}
+    tags: Tuple[str, ...] = ()
+
+
+def cache_counts(caches: Dict[str, Any]) -> Dict[str, Tuple[int, int]]:
+    return {
+        name: (cache.hits, cache.misses)
+        for name, cache in caches.items()
+        if hasattr(cache, "hits")
+    }
+
+
+def generate_page(
+    from_path: str,
+    template_path: str,
+    dest_path: str,
+    parse_cache=None,
+    index_terms: bool = False,
+    highlighter=None,
+    images: Dict[str, Dict[str, str]] = None,
+    minify: bool = False,
+) -> Page:
+    start = time.perf_counter()
+    caches = {"parse": parse_cache, "highlight": highlighter}
+    before = cache_counts(caches)
 
-    html_file = template.replace("{{ Title }}", title).replace(
-        "{{ Content }}", html_content
+    with open(from_path) as markdown_file:
+        markdown = markdown_file.read()
+    try:
+        metadata, markdown = split_front_matter(markdown)
+    except ValueError as error:
+        raise ValueError(f"{from_path}: {error}") from error
+
+    # shared by every layout, so they live beside the default template
+    fragment_dir = os.path.join(os.path.dirname(template_path), FRAGMENT_DIR)
+    if metadata.template:
+        # relative to the default template, so layouts live side by side
+        template_path = os.path.join(os.path.dirname(template_path), metadata.template)
+    template = load_template(template_path, minify)
+
+    title = metadata.title or extract_title(markdown)
+    if parse_cache is not None:
+        blocks = parse_cache.parse(markdown)
+    else:
+        blocks = parse_markdown(markdown)
+    html_node = render_blocks(blocks, highlighter)
+    if images is not None:
+        add_image_props(html_node, images)
+    # a page's terms are its own words, not those of the fragments it includes
+    terms = page_terms([title, *node_text(html_node)]) if index_terms else []
+    include_fragments(html_node, fragment_dir, minify, images)
+    html_content = html_node.to_html(minify)
+
+    html_file = render_template(
+        template,
+        {
+            **fragment_values(fragment_dir, template, minify, images),
+            "Title": escape_text(title),
+            "Content": html_content,
+        },
     )
 
     os.makedirs(os.path.dirname(dest_path), exist_ok=True)
 
-    with open(dest_path, "w") as output:
+    with open_output(dest_path) as output:
         output.write(html_file)
 
+    cache_stats = {
+        name: (hits - before[name][0], misses - before[name][1])
+        for name, (hits, misses) in cache_counts(caches).items()
+    }
+    if metadata.date:
+        mtime = date_timestamp(metadata.date)
+    else:
+        mtime = os.stat(from_path).st_mtime
+    return Page(
+        from_path,
+        dest_path,
+        title,
+        mtime,
+        terms,
+        len(html_file.encode()),
+        time.perf_counter() - start,
+        cache_stats,
+        metadata.tags,
+    )
 
-def generate_pages_recursive(
-    dir_path_content: str, template_path: str, dest_dir_path: str
-) -> None:
-    for item in os.listdir(dir_path_content):
+
+def open_output(path: str) -> TextIO:
+    # static files can be hard linked into several sites' outputs; a file
+    # replacing one is unlinked first rather than written through the link,
+    # which would change every site's copy
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    return open(path, "w")
+
+
+def find_pages(dir_path_content: str, dest_dir_path: str) -> Iterator[Tuple[str, str]]:
+    # sorted so every machine walks, and therefore shards, in the same order
+    for item in sorted(os.listdir(dir_path_content)):
         src_path = os.path.join(dir_path_content, item)
         if os.path.isfile(src_path):
             name, extension = item.split(".")
             if extension == "md":
-                dst_path = os.path.join(dest_dir_path, f"{name}.html")
-                generate_page(src_path, template_path, dst_path)
+                yield src_path, os.path.join(dest_dir_path, f"{name}.html")
         else:
             new_dest_dir = os.path.join(dest_dir_path, item)
             os.mkdir(new_dest_dir)
-            generate_pages_recursive(src_path, template_path, new_dest_dir)
+            yield from find_pages(src_path, new_dest_dir)
+
+
+def _generate_task(
+    task: Tuple[str, str],
+    template_path: str,
+    parse_cache,
+    index_terms: bool,
+    highlighter,
+    images: Dict[str, Dict[str, str]],
+    minify: bool,
+) -> Page:
+    src_path, dst_path = task
+    return generate_page(
+        src_path,
+        template_path,
+        dst_path,
+        parse_cache,
+        index_terms,
+        highlighter,
+        images,
+        minify,
+    )
+
+
+# Pages come back as small Page records, in walk order, whether they were
+# rendered here or in worker processes; everything that aggregates across the
+# site (search index, sitemap, feeds) is fed from those records in this
+# process, so nothing walks or parses the content a second time.
+def generate_pages_recursive(
+    dir_path_content: str,
+    template_path: str,
+    dest_dir_path: str,
+    search_index=None,
+    parse_cache=None,
+    site_index=None,
+    jobs: int = 1,
+    highlighter=None,
+    images: Dict[str, Dict[str, str]] = None,
+    shard: Tuple[int, int] = None,
+    shard_manifest=None,
+    metrics=None,
+    reporter=None,
+    drafts: bool = False,
+    minify: bool = False,
+) -> None:
+    # pages are numbered in walk order before sharding so a shard's records
+    # can later be merged back into single-node order
+    pages = list(enumerate(find_pages(dir_path_content, dest_dir_path)))
+    if shard is not None:
+        index, count = shard
+        pages = [
+            (order, task)
+            for order, task in pages
+            if shard_of(os.path.relpath(task[0], dir_path_content), count) == index
+        ]
+    if not drafts:
+        # only the front matter is read to find drafts, never the full page
+        pages = [
+            (order, task) for order, task in pages if not scan_metadata(task[0]).draft
+        ]
+    orders = [order for order, _ in pages]
+    tasks = [task for _, task in pages]
+
+    render = partial(
+        _generate_task,
+        template_path=template_path,
+        parse_cache=parse_cache,
+        index_terms=search_index is not None or shard_manifest is not None,
+        highlighter=highlighter,
+        images=images,
+        minify=minify,
+    )
+
+    if reporter is not None:
+        reporter.start(len(tasks))
+    sinks = (dest_dir_path, search_index, site_index, shard_manifest, metrics, reporter)
+    if jobs > 1:
+        with ProcessPoolExecutor(jobs) as pool:
+            _collect_pages(orders, pool.map(render, tasks, chunksize=8), *sinks)
+    else:
+        _collect_pages(orders, map(render, tasks), *sinks)
+    if reporter is not None:
+        reporter.finish()
+
+
+def _collect_pages(
+    orders: Iterable[int],
+    pages: Iterable[Page],
+    dest_dir_path: str,
+    search_index,
+    site_index,
+    shard_manifest,
+    metrics,
+    reporter,
+) -> None:
+    for order, page in zip(orders, pages):
+        url = page_url(dest_dir_path, page.dest)
+        if search_index is not None:
+            search_index.add_page(url, page.title, page.terms)
+        if site_index is not None:
+            site_index.add(url, page.title, page.mtime, page.tags)
+        if shard_manifest is not None:
+            shard_manifest.add(
+                order, url, page.title, page.mtime, page.terms, page.tags
+            )
+        if metrics is not None:
+            metrics.record_page(page)
+        if reporter is not None:
+            reporter.page(page)
@@ -0,0 +1,117 @@
+import hashlib
+import importlib
+import os
+from typing import Callable, Dict, Optional, Tuple
+
+# A highlighter is any callable taking (code, language) and returning the
+# highlighted markup for the inside of <code>, or None when it can't handle
+# the language. It should have a `name` that changes whenever its output
+# would, since that name is part of the cache key.
+Highlighter = Callable[[str, str], Optional[str]]
+
+CSS_CLASS = "highlight"
+
+
+class PygmentsHighlighter:
+    def __init__(self, style: str = "default"):
+        import pygments
+        from pygments.formatters import HtmlFormatter
+
+        self.name = f"pygments-{pygments.__version__}-{style}"
+        self.formatter = HtmlFormatter(nowrap=True, style=style)
+
+    def __call__(self, code: str, language: str) -> Optional[str]:
+        from pygments import highlight
+        from pygments.lexers import get_lexer_by_name
+        from pygments.util import ClassNotFound
+
+        try:
+            lexer = get_lexer_by_name(language)
+        except ClassNotFound:
+            return None
+        return highlight(code, lexer, self.formatter)
+
+    def css(self) -> str:
+        return self.formatter.get_style_defs(f".{CSS_CLASS}")
+
+
+def load_highlighter(spec: str) -> Optional[Highlighter]:
+    # "none", "pygments" (skipped quietly if it isn't installed) or a
+    # "module:factory" path to a callable returning a highlighter
+    if spec == "none":
+        return None
+    if spec == "pygments":
+        try:
+            return PygmentsHighlighter()
+        except ImportError:
+            return None
+
+    module_name, _, factory = spec.partition(":")
+    if not factory:
+        raise ValueError(f"Unknown highlighter '{spec}', expected module:factory")
+    return getattr(importlib.import_module(module_name), factory)()
+
+
+# Highlighted snippets keyed by a hash of the highlighter name, language and
+# code. Identical samples repeated across pages are highlighted once per
+# process, and once ever when a cache directory is given.
+class HighlightCache:
+    def __init__(self, highlighter: Highlighter, cache_dir: str = None):
+        self.highlighter = highlighter
+        self.name = getattr(highlighter, "name", type(highlighter).__qualname__)
+        self.dir = os.path.join(cache_dir, "highlight") if cache_dir else None
+        self.snippets: Dict[str, Optional[str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, code: str, language: str) -> str:
+        return hashlib.sha256(f"{self.name}\0{language}\0{code}".encode()).hexdigest()
+
+    def __call__(self, code: str, language: str) -> Optional[str]:
+        key = self.key(code, language)
+        if key in self.snippets:
+            self.hits += 1
+            return self.snippets[key]
+
+        path = os.path.join(self.dir, key[:2], key[2:]) if self.dir else None
+        if path and os.path.exists(path):
+            self.hits += 1
+            with open(path) as cached:
+                html = cached.read() or None
+        else:
+            self.misses += 1
+            html = self.highlighter(code, language)
+            if path:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w") as cached:
+                    cached.write(html or "")
+                os.replace(tmp_path, path)
+
+        self.snippets[key] = html
+        return html
+
+    def __getstate__(self):
+        # worker processes get the highlighter, not this process's snippets,
+        # which in a long-running daemon can be large
+        return {**self.__dict__, "snippets": {}}
+
+    def css(self) -> Optional[str]:
+        css = getattr(self.highlighter, "css", None)
+        return css() if css else None
+
+
+# (highlighter spec, cache dir) -> highlighter and its snippet cache, kept for
+# the life of the process like compiled templates, so a build daemon reuses
+# snippets highlighted by earlier builds
+_highlighters: Dict[Tuple[str, str], Optional[HighlightCache]] = {}
+
+
+def cached_highlighter(spec: str, cache_dir: str = None) -> Optional[HighlightCache]:
+    key = (spec, cache_dir)
+    if key not in _highlighters:
+        highlighter = load_highlighter(spec)
+        if highlighter is not None:
+            highlighter = HighlightCache(highlighter, cache_dir)
+        _highlighters[key] = highlighter
+    return _highlighters[key]
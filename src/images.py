@@ -0,0 +1,227 @@
+import hashlib
+import json
+import os
+import shutil
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp"}
+VARIANT_WIDTHS = (480, 960, 1440)
+
+
+def _jpeg_size(image: BinaryIO) -> Optional[Tuple[int, int]]:
+    image.seek(2)
+    while True:
+        marker = image.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        if code == 0xFF:
+            # fill byte before the real marker
+            image.seek(-1, os.SEEK_CUR)
+            continue
+        if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:
+            continue
+        length = struct.unpack(">H", image.read(2))[0]
+        if length < 2:
+            return None
+        if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack(">xHH", image.read(5))
+            return width, height
+        image.seek(length - 2, os.SEEK_CUR)
+
+
+def image_size(path: str) -> Optional[Tuple[int, int]]:
+    # reads only the header, never decodes pixel data; a truncated or corrupt
+    # header is treated like an unknown format
+    try:
+        size = _header_size(path)
+    except struct.error:
+        return None
+    if size is None or not all(size):
+        return None
+    return size
+
+
+def _header_size(path: str) -> Optional[Tuple[int, int]]:
+    with open(path, "rb") as image:
+        header = image.read(30)
+        if header.startswith(b"\x89PNG\r\n\x1a\n") and header[12:16] == b"IHDR":
+            return struct.unpack(">II", header[16:24])
+        if header[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", header[6:10])
+        if header.startswith(b"\xff\xd8"):
+            return _jpeg_size(image)
+        if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+            chunk = header[12:16]
+            if chunk == b"VP8 ":
+                width, height = struct.unpack("<HH", header[26:30])
+                return width & 0x3FFF, height & 0x3FFF
+            if chunk == b"VP8L":
+                bits = struct.unpack("<I", header[21:25])[0]
+                return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+            if chunk == b"VP8X":
+                width = int.from_bytes(header[24:27], "little") + 1
+                height = int.from_bytes(header[27:30], "little") + 1
+                return width, height
+    return None
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        for chunk in iter(lambda: source.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def variant_name(path: str, width: int) -> str:
+    stem, extension = os.path.splitext(path)
+    return f"{stem}-{width}w{extension}"
+
+
+def resize_image(src_path: str, variants: List[Tuple[int, int, str]]) -> bool:
+    # runs in worker processes; Pillow is optional and only needed here. An
+    # image Pillow can't decode, or refuses to as a decompression bomb, just
+    # gets no variants.
+    from PIL import Image
+
+    try:
+        with Image.open(src_path) as original:
+            for width, height, dest_path in variants:
+                tmp_path = f"{dest_path}.{os.getpid()}.tmp"
+                resized = original.resize((width, height), Image.LANCZOS)
+                resized.save(tmp_path, format=original.format, optimize=True)
+                os.replace(tmp_path, dest_path)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return False
+    return True
+
+
+def can_resize() -> bool:
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+# Finds every image in the static directory, records its intrinsic size and
+# produces downscaled variants next to it in the output. Variants are cached
+# under cache_dir by source hash, and a manifest of source path -> (size,
+# mtime, hash) lets unchanged images skip even the hashing on later builds.
+# Sites with their own static directories share the cache and its manifest.
+class ImageProcessor:
+    def __init__(
+        self,
+        static_dir: str,
+        public_dir: str,
+        cache_dir: str,
+        widths: Tuple[int, ...] = VARIANT_WIDTHS,
+        jobs: int = 1,
+    ):
+        self.static_dir = static_dir
+        self.public_dir = public_dir
+        self.dir = os.path.join(cache_dir, "images")
+        self.manifest_path = os.path.join(self.dir, "manifest.json")
+        self.widths = tuple(sorted(widths))
+        self.jobs = jobs
+        self.processed = 0
+        self.reused = 0
+
+    def find_images(self) -> List[str]:
+        images = []
+        for root, _, files in os.walk(self.static_dir):
+            for name in files:
+                if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                    images.append(
+                        os.path.relpath(os.path.join(root, name), self.static_dir)
+                    )
+        return sorted(images)
+
+    def load_manifest(self) -> Dict[str, list]:
+        try:
+            with open(self.manifest_path) as manifest:
+                return json.load(manifest)
+        except (OSError, ValueError):
+            return {}
+
+    def process(self) -> Dict[str, Dict[str, str]]:
+        # returns image url -> props to add to its <img> tag
+        os.makedirs(self.dir, exist_ok=True)
+        old_manifest = self.load_manifest()
+        static_dir = os.path.abspath(self.static_dir)
+        # this directory's entries are rebuilt, other directories' are kept
+        manifest = {
+            path: entry
+            for path, entry in old_manifest.items()
+            if os.path.isabs(path) and not path.startswith(static_dir + os.sep)
+        }
+        resize = can_resize()
+        found = []
+        pending = []
+
+        for rel_path in self.find_images():
+            src_path = os.path.join(static_dir, rel_path)
+            stat = os.stat(src_path)
+            entry = old_manifest.get(src_path)
+            if entry and entry[:2] == [stat.st_size, stat.st_mtime_ns]:
+                source_hash, size = entry[2], entry[3:5]
+            else:
+                source_hash, size = file_hash(src_path), image_size(src_path)
+            if not size:
+                continue
+            width, height = size
+            manifest[src_path] = [stat.st_size, stat.st_mtime_ns, source_hash, *size]
+
+            extension = os.path.splitext(rel_path)[1].lower()
+            variants = []
+            for variant_width in self.widths if resize else ():
+                if variant_width >= width:
+                    break
+                variant_height = max(1, round(height * variant_width / width))
+                cached = os.path.join(
+                    self.dir, f"{source_hash}-{variant_width}w{extension}"
+                )
+                variants.append((variant_width, variant_height, cached))
+            found.append((rel_path, width, height, variants))
+
+            missing = [
+                variant for variant in variants if not os.path.exists(variant[2])
+            ]
+            if missing:
+                pending.append((src_path, missing))
+                self.processed += 1
+            else:
+                self.reused += 1
+
+        if self.jobs > 1 and len(pending) > 1:
+            with ProcessPoolExecutor(self.jobs) as pool:
+                list(pool.map(resize_image, *zip(*pending)))
+        else:
+            for src_path, missing in pending:
+                resize_image(src_path, missing)
+
+        images = {}
+        for rel_path, width, height, variants in found:
+            url = "/" + rel_path.replace(os.sep, "/")
+            props = {"width": str(width), "height": str(height), "loading": "lazy"}
+            srcset = []
+            for variant_width, _, cached in variants:
+                if not os.path.exists(cached):
+                    continue
+                dest_path = os.path.join(
+                    self.public_dir, variant_name(rel_path, variant_width)
+                )
+                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                shutil.copy(cached, dest_path)
+                srcset.append(f"{variant_name(url, variant_width)} {variant_width}w")
+            if srcset:
+                props["srcset"] = ", ".join([*srcset, f"{url} {width}w"])
+            images[url] = props
+
+        with open(self.manifest_path, "w") as manifest_file:
+            json.dump(manifest, manifest_file, sort_keys=True)
+
+        return images
@@ -1,34 +1,415 @@
+import argparse
 import os
 import shutil
+import tempfile
+from contextlib import nullcontext
+from typing import ContextManager, Dict, List, Sequence, Tuple
 
-from config import CONTENT_DIR, PUBLIC_DIR, STATIC_DIR, TEMPLATE_FILE
-from generate import generate_pages_recursive
+from config import (
+    BASE_URL,
+    CACHE_DIR,
+    CONTENT_DIR,
+    METRICS_DIR,
+    PUBLIC_DIR,
+    STATIC_DIR,
+    TEMPLATE_FILE,
+)
 
 
-def copy_files(src_dir, dst_dir):
-    for item in os.listdir(src_dir):
+def copy_files(src_dir, dst_dir, metrics=None):
+    # sorted so output is written in the same order on every filesystem
+    for item in sorted(os.listdir(src_dir)):
         if os.path.isfile(os.path.join(src_dir, item)):
             src_file = os.path.join(src_dir, item)
             dst_file = os.path.join(dst_dir, item)
             shutil.copy(src_file, dst_file)
+            if metrics is not None:
+                metrics.inc("ssg_static_files_total", action="copied")
+                metrics.inc(
+                    "ssg_bytes_written_total", os.path.getsize(dst_file), kind="static"
+                )
         else:
             new_src_dir = os.path.join(src_dir, item)
             new_dst_dir = os.path.join(dst_dir, item)
             os.mkdir(new_dst_dir)
-            copy_files(new_src_dir, new_dst_dir)
+            copy_files(new_src_dir, new_dst_dir, metrics)
 
 
-def main():
+def reset_output(public_dir: str) -> None:
     try:
-        shutil.rmtree(PUBLIC_DIR)
+        shutil.rmtree(public_dir)
     except FileNotFoundError:
         pass
     finally:
-        os.mkdir(PUBLIC_DIR)
+        os.makedirs(public_dir)
+
+
+def build_static(
+    static_dir: str,
+    public_dir: str,
+    cache_dir: str,
+    jobs: int = 1,
+    highlighter: str = "pygments",
+    metrics=None,
+) -> Dict[str, Dict[str, str]]:
+    # imported here so tooling and daemon clients don't pay for the pipeline
+    from highlight import cached_highlighter
+    from images import ImageProcessor
+
+    copy_files(static_dir, public_dir, metrics)
+
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        # without a build cache, image variants only live for this build
+        image_processor = ImageProcessor(
+            static_dir, public_dir, cache_dir or scratch_dir, jobs=jobs
+        )
+        images = image_processor.process()
+    if metrics is not None:
+        metrics.inc("ssg_images_total", image_processor.processed, result="processed")
+        metrics.inc("ssg_images_total", image_processor.reused, result="reused")
+
+    # written even when empty, since the template always links it
+    highlight = cached_highlighter(highlighter, cache_dir)
+    css = highlight.css() if highlight is not None else None
+    with open(os.path.join(public_dir, "highlight.css"), "w") as css_file:
+        css_file.write(css or "")
+
+    return images
+
+
+def build_pages(
+    content_dir: str,
+    template_path: str,
+    public_dir: str,
+    cache_dir: str,
+    base_url: str = BASE_URL,
+    jobs: int = 1,
+    highlighter: str = "pygments",
+    images: Dict[str, Dict[str, str]] = None,
+    shard: Tuple[int, int] = None,
+    metrics=None,
+    output: str = "progress",
+    drafts: bool = False,
+    minify: bool = False,
+    archives: Sequence[str] = (),
+    per_page: int = 20,
+) -> None:
+    from aggregate import SiteIndex
+    from cache import ParseCache
+    from generate import generate_pages_recursive
+    from highlight import cached_highlighter
+    from progress import Reporter
+    from search import SearchIndex
+    from shard import ShardManifest
+
+    reporter = Reporter(output)
+    parse_cache = ParseCache(cache_dir) if cache_dir else None
+    highlight = cached_highlighter(highlighter, cache_dir)
+
+    if shard is not None:
+        # site-wide outputs are written by merge_shards once every shard is in
+        shard_manifest = ShardManifest(public_dir, shard, images)
+        try:
+            with stage(metrics, "pages"):
+                generate_pages_recursive(
+                    content_dir,
+                    template_path,
+                    public_dir,
+                    parse_cache=parse_cache,
+                    jobs=jobs,
+                    highlighter=highlight,
+                    images=images,
+                    shard=shard,
+                    shard_manifest=shard_manifest,
+                    metrics=metrics,
+                    reporter=reporter,
+                    drafts=drafts,
+                    minify=minify,
+                )
+        finally:
+            shard_manifest.close()
+        return
+
+    search_index = SearchIndex(public_dir)
+    site_index = SiteIndex()
+    try:
+        with stage(metrics, "pages"):
+            generate_pages_recursive(
+                content_dir,
+                template_path,
+                public_dir,
+                search_index,
+                parse_cache,
+                site_index,
+                jobs,
+                highlight,
+                images,
+                metrics=metrics,
+                reporter=reporter,
+                drafts=drafts,
+                minify=minify,
+            )
+    except BaseException:
+        search_index.abort()
+        raise
+    with stage(metrics, "index"):
+        search_index.close()
+        site_index.write(
+            public_dir,
+            template_path,
+            base_url,
+            minify=minify,
+            archives=archives,
+            per_page=per_page,
+            images=images,
+        )
+
+
+def build(
+    content_dir: str = CONTENT_DIR,
+    template_path: str = TEMPLATE_FILE,
+    public_dir: str = PUBLIC_DIR,
+    static_dir: str = STATIC_DIR,
+    cache_dir: str = CACHE_DIR,
+    base_url: str = BASE_URL,
+    jobs: int = 1,
+    highlighter: str = "pygments",
+    shard: Tuple[int, int] = None,
+    metrics=None,
+    output: str = "progress",
+    drafts: bool = False,
+    minify: bool = False,
+    archives: Sequence[str] = (),
+    per_page: int = 20,
+) -> None:
+    reset_output(public_dir)
+    with stage(metrics, "static"):
+        images = build_static(
+            static_dir, public_dir, cache_dir, jobs, highlighter, metrics
+        )
+    build_pages(
+        content_dir,
+        template_path,
+        public_dir,
+        cache_dir,
+        base_url,
+        jobs,
+        highlighter,
+        images,
+        shard,
+        metrics,
+        output,
+        drafts,
+        minify,
+        archives,
+        per_page,
+    )
+
+
+def stage(metrics, name: str) -> ContextManager:
+    return metrics.stage(name) if metrics is not None else nullcontext()
+
+
+def run_build(
+    sites_config: str = None,
+    merge: List[str] = None,
+    metrics_dir: str = METRICS_DIR,
+    **options,
+) -> None:
+    from metrics import Metrics
+
+    # written even when the build fails, so slow or broken builds still show
+    # up on the dashboards
+    metrics = Metrics()
+    try:
+        with metrics.stage("total"):
+            _run_build(sites_config, merge, metrics, **options)
+    finally:
+        if metrics_dir:
+            metrics.record_peak_rss()
+            metrics.write(metrics_dir)
+
+
+def _run_build(sites_config: str, merge: List[str], metrics, **options) -> None:
+    if merge:
+        from shard import merge_shards
+
+        with metrics.stage("merge"):
+            merge_shards(
+                merge,
+                options.get("public_dir", PUBLIC_DIR),
+                options.get("template_path", TEMPLATE_FILE),
+                options.get("base_url", BASE_URL),
+                options.get("minify", False),
+                options.get("archives", ()),
+                options.get("per_page", 20),
+            )
+        return
+    if not sites_config:
+        build(**options, metrics=metrics)
+        return
+
+    from sites import build_sites, load_sites
+
+    build_sites(
+        load_sites(sites_config),
+        options.get("cache_dir", CACHE_DIR),
+        options.get("jobs", 1),
+        options.get("highlighter", "pygments"),
+        metrics,
+        options.get("output", "progress"),
+        options.get("drafts", False),
+        options.get("minify", False),
+        options.get("archives", ()),
+        options.get("per_page", 20),
+    )
+
+
+def main():
+    from progress import OUTPUT_MODES
+
+    parser = argparse.ArgumentParser(description="Static site generator")
+    parser.add_argument(
+        "--content", default=CONTENT_DIR, help="Markdown source directory"
+    )
+    parser.add_argument("--template", default=TEMPLATE_FILE, help="HTML template file")
+    parser.add_argument("--public", default=PUBLIC_DIR, help="Output directory")
+    parser.add_argument("--static", default=STATIC_DIR, help="Static assets directory")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="Build cache directory")
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Parse every page from scratch"
+    )
+    parser.add_argument(
+        "--metrics-dir",
+        default=METRICS_DIR,
+        help="Where to write build.prom and build.json; empty to disable",
+    )
+    parser.add_argument(
+        "--base-url", default=BASE_URL, help="Site URL used in the sitemap and feed"
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=1, help="Number of processes rendering pages"
+    )
+    parser.add_argument(
+        "--highlighter",
+        default="pygments",
+        help="Code highlighter: pygments, none, or module:factory",
+    )
+    parser.add_argument(
+        "--output",
+        choices=OUTPUT_MODES,
+        default="progress",
+        help="Build output: nothing, a progress line, every page, or JSON lines",
+    )
+    parser.add_argument(
+        "--drafts", action="store_true", help="Also build pages marked draft"
+    )
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="Collapse whitespace in pages and templates as they are written",
+    )
+    parser.add_argument(
+        "--archive",
+        metavar="SECTION",
+        action="append",
+        default=[],
+        help="Write paginated archive pages of every page below a section url",
+    )
+    parser.add_argument(
+        "--per-page", type=int, default=20, help="Entries on each archive page"
+    )
+    parser.add_argument(
+        "--sites",
+        metavar="CONFIG",
+        help="JSON file listing several sites or locales to build in one run",
+    )
+    parser.add_argument(
+        "--shard",
+        metavar="I/N",
+        help="Only render pages in shard I of N; combine shards with --merge",
+    )
+    parser.add_argument(
+        "--merge",
+        metavar="SHARD_DIR",
+        nargs="+",
+        help="Merge the outputs of shard builds into the public directory",
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--daemon",
+        metavar="SOCKET",
+        help="Run a build daemon listening on a local socket",
+    )
+    mode.add_argument(
+        "--verify",
+        action="store_true",
+        help="Build serially and in parallel into scratch directories and"
+        " report any output file that differs",
+    )
+    mode.add_argument(
+        "--via",
+        metavar="SOCKET",
+        help="Send the build to a running daemon instead of building in-process",
+    )
+    args = parser.parse_args()
+    if args.per_page < 1:
+        parser.error("--per-page must be at least 1")
+
+    paths = {
+        "content_dir": os.path.abspath(args.content),
+        "template_path": os.path.abspath(args.template),
+        "public_dir": os.path.abspath(args.public),
+        "static_dir": os.path.abspath(args.static),
+        "cache_dir": None if args.no_cache else os.path.abspath(args.cache_dir),
+        "metrics_dir": os.path.abspath(args.metrics_dir) if args.metrics_dir else "",
+    }
+    options = {
+        "base_url": args.base_url,
+        "jobs": args.jobs,
+        "highlighter": args.highlighter,
+        "output": args.output,
+        "drafts": args.drafts,
+        "minify": args.minify,
+        "archives": args.archive,
+        "per_page": args.per_page,
+    }
+    if args.sites and args.shard:
+        parser.error("--shard can't be combined with --sites")
+    if args.sites:
+        options["sites_config"] = os.path.abspath(args.sites)
+    if args.shard:
+        from shard import parse_shard
+
+        try:
+            options["shard"] = parse_shard(args.shard)
+        except ValueError as error:
+            parser.error(str(error))
+    if args.merge:
+        options["merge"] = [os.path.abspath(shard_dir) for shard_dir in args.merge]
+
+    if args.verify:
+        from verify import verify_build
+
+        if args.sites or args.shard or args.merge:
+            parser.error("--verify checks a single site build")
+        paths.pop("metrics_dir")
+        if verify_build(**paths, **options):
+            raise SystemExit(1)
+    elif args.daemon:
+        from daemon import serve
 
-    copy_files(STATIC_DIR, PUBLIC_DIR)
+        serve(args.daemon)
+    elif args.via:
+        from daemon import request_build
 
-    generate_pages_recursive(CONTENT_DIR, TEMPLATE_FILE, PUBLIC_DIR)
+        response = request_build(args.via, **paths, **options)
+        if not response["ok"]:
+            raise SystemExit(f"Build failed: {response['error']}")
+        print(f"Built in {response['seconds']:.3f}s")
+    else:
+        run_build(**paths, **options)
 
 
-main()
+if __name__ == "__main__":
+    main()
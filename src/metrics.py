@@ -0,0 +1,210 @@
+import json
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0, 120.0)
+SIZE_BUCKETS = (1_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 10_000_000)
+
+# name -> (type, help)
+METRICS = {
+    "ssg_pages_generated_total": ("counter", "Pages rendered to HTML"),
+    "ssg_bytes_written_total": ("counter", "Bytes written to the output, by kind"),
+    "ssg_static_files_total": ("counter", "Static files by what the build did"),
+    "ssg_images_total": ("counter", "Images by whether variants were made or reused"),
+    "ssg_cache_requests_total": ("counter", "Build cache lookups by cache and result"),
+    "ssg_stage_duration_seconds": ("gauge", "Wall time of each build stage"),
+    "ssg_peak_rss_bytes": ("gauge", "Peak resident set size by process"),
+    "ssg_page_render_seconds": ("histogram", "Time to render a single page"),
+    "ssg_page_size_bytes": ("histogram", "Size of each rendered page"),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{key}="{value}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def peak_rss(who: int) -> int:
+    # ru_maxrss is kilobytes on Linux but bytes on macOS
+    rss = resource.getrusage(who).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other: "Histogram") -> None:
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.sum += other.sum
+        self.count += other.count
+
+
+# Counters, gauges and histograms for one build, keyed by metric name and a
+# sorted tuple of label pairs. Plain data throughout so a worker process can
+# return its Metrics to the parent to be merged.
+class Metrics:
+    def __init__(self):
+        self.values: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        self.values[key] = self.values.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        self.values[(name, tuple(sorted(labels.items())))] = value
+
+    def get(self, name: str, **labels: str) -> float:
+        return self.values.get((name, tuple(sorted(labels.items()))), 0)
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        if key not in self.histograms:
+            buckets = SIZE_BUCKETS if name.endswith("_bytes") else DURATION_BUCKETS
+            self.histograms[key] = Histogram(buckets)
+        self.histograms[key].observe(value)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.inc("ssg_stage_duration_seconds", seconds, stage=name)
+
+    def record_page(self, page) -> None:
+        self.inc("ssg_pages_generated_total")
+        self.inc("ssg_bytes_written_total", page.size, kind="page")
+        self.observe("ssg_page_render_seconds", page.seconds)
+        self.observe("ssg_page_size_bytes", page.size)
+        for cache, (hits, misses) in page.cache_stats.items():
+            self.inc("ssg_cache_requests_total", hits, cache=cache, result="hit")
+            self.inc("ssg_cache_requests_total", misses, cache=cache, result="miss")
+
+    def merge(self, other: "Metrics") -> None:
+        # counters add up; a gauge keeps the largest value, so stages run in
+        # parallel by several workers report the slowest one
+        for key, value in other.values.items():
+            if METRICS[key[0]][0] == "counter":
+                self.values[key] = self.values.get(key, 0) + value
+            else:
+                self.values[key] = max(self.values.get(key, 0), value)
+        for key, histogram in other.histograms.items():
+            if key in self.histograms:
+                self.histograms[key].merge(histogram)
+            else:
+                self.histograms[key] = histogram
+
+    def record_peak_rss(self) -> None:
+        # children only covers worker processes that have already exited
+        main_rss = peak_rss(resource.RUSAGE_SELF)
+        workers_rss = peak_rss(resource.RUSAGE_CHILDREN)
+        self.set("ssg_peak_rss_bytes", main_rss, process="main")
+        self.set("ssg_peak_rss_bytes", workers_rss, process="workers")
+
+    def cache_hit_rates(self) -> Dict[str, float]:
+        rates = {}
+        caches = {
+            dict(labels)["cache"]
+            for name, labels in self.values
+            if name == "ssg_cache_requests_total"
+        }
+        for cache in sorted(caches):
+            hits = self.get("ssg_cache_requests_total", cache=cache, result="hit")
+            misses = self.get("ssg_cache_requests_total", cache=cache, result="miss")
+            rates[cache] = hits / (hits + misses) if hits + misses else 0.0
+        return rates
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+        for name, (metric_type, help_text) in METRICS.items():
+            samples = sorted(
+                (labels, value)
+                for (key, labels), value in self.values.items()
+                if key == name
+            )
+            histograms = sorted(
+                (
+                    (labels, histogram)
+                    for (key, labels), histogram in self.histograms.items()
+                    if key == name
+                ),
+                key=lambda item: item[0],
+            )
+            if not samples and not histograms:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+            for labels, histogram in histograms:
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    bucket = format_labels(labels, f'le="{bound:g}"')
+                    lines.append(f"{name}_bucket{bucket} {cumulative}")
+                bucket = format_labels(labels, 'le="+Inf"')
+                lines.append(f"{name}_bucket{bucket} {histogram.count}")
+                total = format_value(histogram.sum)
+                lines.append(f"{name}_sum{format_labels(labels)} {total}")
+                count = format_labels(labels)
+                lines.append(f"{name}_count{count} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def to_json(self) -> Dict:
+        report = {"metrics": {}, "cache_hit_rates": self.cache_hit_rates()}
+        for (name, labels), value in sorted(self.values.items()):
+            report["metrics"].setdefault(name, []).append(
+                {"labels": dict(labels), "value": value}
+            )
+        for (name, labels), histogram in sorted(
+            self.histograms.items(), key=lambda item: item[0]
+        ):
+            buckets = [f"{bound:g}" for bound in histogram.buckets]
+            report["metrics"].setdefault(name, []).append(
+                {
+                    "labels": dict(labels),
+                    "buckets": dict(zip(buckets, histogram.counts)),
+                    "sum": histogram.sum,
+                    "count": histogram.count,
+                }
+            )
+        return report
+
+    def write(self, metrics_dir: str) -> None:
+        os.makedirs(metrics_dir, exist_ok=True)
+        # write-then-rename so a scraper never reads a half-written file
+        for name, content in [
+            ("build.prom", self.to_prometheus()),
+            ("build.json", json.dumps(self.to_json(), indent=2) + "\n"),
+        ]:
+            path = os.path.join(metrics_dir, name)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as output:
+                output.write(content)
+            os.replace(tmp_path, path)
@@ -1,8 +1,12 @@
 import re
-from typing import List, Self, Tuple
+from typing import Any, Iterator, List, Self, Tuple
 
 from config import BlockType, TextType
 
+# bump whenever the structure returned by parse_markdown changes so cached
+# parses from older versions are discarded
+PARSER_VERSION = 5
+
 
 class TextNode:
     def __init__(self, text: str, text_type: TextType, url: str = None):
@@ -48,56 +52,73 @@ def split_nodes_delimeter(
     return new_nodes
 
 
-def split_nodes_image(old_nodes: List[TextNode]) -> List[TextNode]:
+def find_markdown_links(text: str, opener: str) -> Iterator[Tuple[int, int, str, str]]:
+    # yields (start, end, text, url) for every opener + "text](url)", matching
+    # exactly what the regex !?\[(.*?)\]\((.*?)\) finds, but in linear time:
+    # the regex retries every opener up to the end of the line when there is
+    # no closing "](...)", which is quadratic on bracket-heavy text
+    position = 0
+    while True:
+        start = text.find(opener, position)
+        if start == -1:
+            return
+        line_end = text.find("\n", start)
+        if line_end == -1:
+            line_end = len(text)
+        # "](" and ")" can't cross a line break; if this opener has no closing
+        # on its line then neither does any later opener on the same line
+        middle = text.find("](", start + len(opener), line_end)
+        end = text.find(")", middle + 2, line_end) if middle != -1 else -1
+        if end == -1:
+            position = line_end + 1
+            continue
+        yield start, end + 1, text[start + len(opener) : middle], text[middle + 2 : end]
+        position = end + 1
+
+
+def split_markdown_links(
+    node: TextNode, opener: str, text_type: TextType
+) -> List[TextNode]:
     new_nodes = []
-    for node in old_nodes:
+    position = 0
+    for start, end, text, url in find_markdown_links(node.text, opener):
+        if start > position:
+            new_nodes.append(TextNode(node.text[position:start], TextType.TEXT))
+        new_nodes.append(TextNode(text, text_type, url))
+        position = end
+    if not new_nodes:
+        return [node]
+    if position < len(node.text):
+        new_nodes.append(TextNode(node.text[position:], TextType.TEXT))
+    return new_nodes
 
-        images = extract_markdown_images(node.text)
 
-        if node.text_type != TextType.TEXT or not images:
+def split_nodes_image(old_nodes: List[TextNode]) -> List[TextNode]:
+    new_nodes = []
+    for node in old_nodes:
+        if node.text_type != TextType.TEXT:
             new_nodes.append(node)
             continue
-
-        alt_text, url = images[0]
-        text_node, next_node = node.text.split(f"![{alt_text}]({url})", 1)
-        if text_node:
-            new_nodes.append(TextNode(text_node, TextType.TEXT))
-        new_nodes.append(TextNode(alt_text, TextType.IMAGE, url))
-        if next_node:
-            new_nodes.extend(split_nodes_image([TextNode(next_node, TextType.TEXT)]))
-
+        new_nodes.extend(split_markdown_links(node, "![", TextType.IMAGE))
     return new_nodes
 
 
 def split_nodes_link(old_nodes: List[TextNode]):
     new_nodes = []
     for node in old_nodes:
-
-        links = extract_markdown_links(node.text)
-
-        if node.text_type != TextType.TEXT or not links:
+        if node.text_type != TextType.TEXT:
             new_nodes.append(node)
             continue
-
-        text, url = links[0]
-        text_node, next_node = node.text.split(f"[{text}]({url})", 1)
-        if text_node:
-            new_nodes.append(TextNode(text_node, TextType.TEXT))
-        new_nodes.append(TextNode(text, TextType.LINK, url))
-        if next_node:
-            new_nodes.extend(split_nodes_link([TextNode(next_node, TextType.TEXT)]))
-
+        new_nodes.extend(split_markdown_links(node, "[", TextType.LINK))
     return new_nodes
 
 
 def extract_markdown_images(text: str) -> List[Tuple[str, str]]:
-    matches = re.findall("!\[(.*?)\]\((.*?)\)", text)
-    return matches
+    return [(alt, url) for _, _, alt, url in find_markdown_links(text, "![")]
 
 
 def extract_markdown_links(text: str) -> List[Tuple[str, str]]:
-    matches = re.findall("\[(.*?)\]\((.*?)\)", text)
-    return matches
+    return [(label, url) for _, _, label, url in find_markdown_links(text, "[")]
 
 
 def text_to_textnodes(text: str) -> List[TextNode]:
@@ -111,38 +132,273 @@ def text_to_textnodes(text: str) -> List[TextNode]:
     return nodes
 
 
+# markdown_to_blocks and block_to_block_type classify blank-line separated
+# blocks on their own; the build parses whole documents with parse_markdown
 def markdown_to_blocks(markdown: str) -> List[str]:
-    blocks = [block.strip() for block in markdown.split("\n\n") if block]
+    blocks = [block.strip() for block in markdown.split("\n\n") if block.strip()]
 
     return blocks
 
 
+ORDERED_ITEM_RE = re.compile(r"(\d+)\.")
+
+
+def first_word(line: str) -> str:
+    # "" for blank lines, which split()[0] would raise on
+    words = line.split(maxsplit=1)
+    return words[0] if words else ""
+
+
 def block_to_block_type(block: str) -> BlockType:
-    block_start = block.split()[0]
-    block_end = block.split()[-1]
+    block_start = first_word(block)
+    block_end = block.rsplit(maxsplit=1)[-1] if block_start else ""
 
-    if block_start in "######":
+    if block_start and block_start in "######" and " " in block.split("\n", 1)[0]:
         return BlockType.HEADING
-    if block_start == "```" and block_end == "```":
+    if block_start.startswith("```") and block_end == "```":
         return BlockType.CODE
     if block_start == ">":
         for line in block.split("\n"):
-            if line.split()[0] != ">":
+            if first_word(line) != ">":
                 return BlockType.PARAGRAPH
         return BlockType.QUOTE
-    if block_start in "*-":
+    if block_start and block_start in "*-":
         list_char = block_start
         for line in block.split("\n"):
-            if line.split()[0] != list_char:
+            if first_word(line) != list_char:
                 return BlockType.PARAGRAPH
         return BlockType.UNORDERED
     if block_start == "1.":
         items = 1
         for line in block.split("\n"):
-
-            if (not line[0].isdigit()) or (int(line.split(".")[0]) != items):
+            # malformed numbers ("1x.", "1)") make the block a paragraph
+            number = ORDERED_ITEM_RE.match(line)
+            if not number or int(number.group(1)) != items:
                 return BlockType.PARAGRAPH
             items += 1
         return BlockType.ORDERED
 
     return BlockType.PARAGRAPH
+
+
+def parse_quote(block: str) -> List[TextNode]:
+    text = " ".join([line.lstrip("> ") for line in block.split("\n")])
+    return text_to_textnodes(text)
+
+
+def parse_list(block: str, block_type: BlockType) -> Any:
+    blocks = parse_markdown(block)
+    if len(blocks) != 1 or blocks[0][0] != block_type:
+        raise ValueError(f"Block is not a single {block_type}: {block[:40]!r}")
+    return blocks[0][1]
+
+
+def parse_unordered(block: str) -> List[List[Tuple[BlockType, Any]]]:
+    # a list item is a list of blocks, so items can hold paragraphs, code
+    # and nested lists
+    return parse_list(block, BlockType.UNORDERED)
+
+
+def parse_ordered(block: str) -> Tuple[int, List[List[Tuple[BlockType, Any]]]]:
+    # (number of the first item, items)
+    return parse_list(block, BlockType.ORDERED)
+
+
+def parse_code(block: str) -> Tuple[str, str]:
+    # returns (language, code); language comes from the opening fence's info
+    # string and is empty when there is none
+    if not block.startswith("```"):
+        return "", block
+    lines = block.split("\n")
+    language = lines[0][3:].strip()
+    if len(lines) > 1 and lines[-1].strip() == "```":
+        lines = lines[:-1]
+    return language, "\n".join(lines[1:]) + "\n"
+
+
+def parse_heading(block: str) -> Tuple[int, List[TextNode]]:
+    parts = block.split(" ", 1)
+    return len(parts[0]), text_to_textnodes(parts[1])
+
+
+def parse_paragraph(block: str) -> List[TextNode]:
+    return text_to_textnodes(block)
+
+
+LIST_ITEM_RE = re.compile(r"( *)([-*]|(\d{1,9})\.)( +)(\S.*)")
+HEADING_RE = re.compile(r"#{1,6} +\S")
+THEMATIC_BREAK_RE = re.compile(r"([-*_])(?: *\1){2,} *")
+# deeper list markers are kept as text, which bounds the recursion needed to
+# render or cache a document whatever its input
+MAX_LIST_DEPTH = 16
+
+
+# "* * *" is a thematic break, never an item holding nested items
+def match_list_item(text: str) -> re.Match:
+    if THEMATIC_BREAK_RE.fullmatch(text.strip()):
+        return None
+    return LIST_ITEM_RE.match(text)
+
+
+# Whether a line interrupts an open paragraph. An ordered item only does when
+# numbered 1 or when it continues an ordered list that is already open
+# (list_open), so "published in\n1954. It was" stays one paragraph. A "---"
+# under a paragraph would be a setext heading, which isn't supported, so only
+# "*" and "_" thematic breaks interrupt.
+def is_block_start(text: str, list_open: bool = False) -> bool:
+    item = match_list_item(text)
+    if item and item.group(3) is not None and not list_open:
+        item = int(item.group(3)) == 1
+    stripped = text.rstrip()
+    return bool(
+        item
+        or text.startswith("```")
+        or HEADING_RE.match(text)
+        or text == ">"
+        or text.startswith("> ")
+        or (THEMATIC_BREAK_RE.fullmatch(stripped) and stripped[0] != "-")
+    )
+
+
+class ListBlock:
+    def __init__(self, block_type: BlockType, marker: str, start: int):
+        self.block_type = block_type
+        self.marker = marker
+        self.start = start
+        self.items: List[Container] = []
+
+
+# The document or one list item: the blocks finished so far, the column its
+# content starts at, and the paragraph, quote or code fence still taking lines.
+class Container:
+    def __init__(self, indent: int):
+        self.indent = indent
+        self.blocks: List[Any] = []
+        self.leaf_type: BlockType = None
+        self.lines: List[str] = []
+        # the list a following item at this level is added to
+        self.open_list: ListBlock = None
+
+    def open_leaf(self, leaf_type: BlockType, first_line: str) -> None:
+        self.close_leaf()
+        self.open_list = None
+        self.leaf_type = leaf_type
+        self.lines = [first_line]
+
+    def close_leaf(self) -> None:
+        if self.leaf_type is None:
+            return
+        text = "\n".join(self.lines)
+        if self.leaf_type == BlockType.PARAGRAPH:
+            self.blocks.append((BlockType.PARAGRAPH, parse_paragraph(text.strip())))
+        elif self.leaf_type == BlockType.QUOTE:
+            self.blocks.append((BlockType.QUOTE, parse_quote(text)))
+        else:
+            # first line is the fence's info string
+            code = "\n".join(self.lines[1:]) + "\n"
+            self.blocks.append((BlockType.CODE, (self.lines[0], code)))
+        self.leaf_type = None
+        self.lines = []
+
+    def finish(self) -> List[Tuple[BlockType, Any]]:
+        self.close_leaf()
+        blocks = []
+        for block in self.blocks:
+            if isinstance(block, ListBlock):
+                items = [item.finish() for item in block.items]
+                if block.block_type == BlockType.ORDERED:
+                    blocks.append((BlockType.ORDERED, (block.start, items)))
+                else:
+                    blocks.append((BlockType.UNORDERED, items))
+            else:
+                blocks.append(block)
+        return blocks
+
+
+# whether an ordered item at this indent would join a list that is already
+# open rather than start a new one
+def ordered_list_open(stack: List[Container], indent: int) -> bool:
+    container = next(item for item in reversed(stack) if item.indent <= indent)
+    return container.open_list is not None and container.open_list.marker == "."
+
+
+def add_block(stack: List[Container], text: str) -> None:
+    # text starts at the content column of the innermost container
+    item = match_list_item(text)
+    while item and len(stack) <= MAX_LIST_DEPTH:
+        container = stack[-1]
+        spaces, marker, number, gap, text = item.groups()
+        block_type = BlockType.ORDERED if number else BlockType.UNORDERED
+        kind = "." if number else marker
+        container.close_leaf()
+        if container.open_list is None or container.open_list.marker != kind:
+            container.open_list = ListBlock(block_type, kind, int(number or 1))
+            container.blocks.append(container.open_list)
+        child = Container(container.indent + len(spaces) + len(marker) + len(gap))
+        container.open_list.items.append(child)
+        stack.append(child)
+        # "- - a" opens an item and a nested list on the same line
+        item = match_list_item(text)
+
+    container = stack[-1]
+    stripped = text.strip()
+    if stripped.startswith("```"):
+        container.open_leaf(BlockType.CODE, stripped[3:].strip())
+    elif HEADING_RE.match(stripped):
+        container.close_leaf()
+        container.open_list = None
+        container.blocks.append((BlockType.HEADING, parse_heading(stripped)))
+    elif THEMATIC_BREAK_RE.fullmatch(stripped):
+        container.close_leaf()
+        container.open_list = None
+        container.blocks.append((BlockType.THEMATIC_BREAK, None))
+    elif stripped == ">" or stripped.startswith("> "):
+        if container.leaf_type == BlockType.QUOTE:
+            container.lines.append(stripped)
+        else:
+            container.open_leaf(BlockType.QUOTE, stripped)
+    elif container.leaf_type == BlockType.PARAGRAPH:
+        container.lines.append(text)
+    else:
+        container.open_leaf(BlockType.PARAGRAPH, text)
+
+
+# One forward pass over the lines with a stack of open containers: the
+# document at the bottom and a list item for each level of nesting. A line
+# indented less than an item's content closes that item; list items,
+# headings, fences, quotes and thematic breaks interrupt a paragraph (see
+# is_block_start), anything else continues it, even when not indented (a
+# lazy continuation line).
+def parse_markdown(markdown: str) -> List[Tuple[BlockType, Any]]:
+    document = Container(0)
+    stack = [document]
+    for line in markdown.split("\n"):
+        text = line.lstrip(" \t")
+        indent = len(line[: len(line) - len(text)].expandtabs(4))
+        container = stack[-1]
+        # the line with up to the innermost container's indent removed
+        relative = " " * max(indent - container.indent, 0) + text
+
+        if container.leaf_type == BlockType.CODE and (
+            not text or indent >= container.indent
+        ):
+            if text.rstrip() == "```":
+                container.close_leaf()
+            else:
+                # code keeps its own tabs unless it sits inside a list item
+                container.lines.append(relative if container.indent else line)
+            continue
+        if not text.strip():
+            container.close_leaf()
+            continue
+        if container.leaf_type == BlockType.PARAGRAPH and not is_block_start(
+            text, ordered_list_open(stack, indent)
+        ):
+            container.lines.append(relative)
+            continue
+
+        while len(stack) > 1 and indent < stack[-1].indent:
+            stack.pop().close_leaf()
+        add_block(stack, " " * (indent - stack[-1].indent) + text)
+
+    return document.finish()
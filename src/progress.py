@@ -0,0 +1,135 @@
+import json
+import sys
+import time
+from typing import List, TextIO
+
+OUTPUT_MODES = ("quiet", "progress", "verbose", "json")
+BAR_WIDTH = 30
+
+
+def pages(count: int) -> str:
+    return f"{count} page" if count == 1 else f"{count} pages"
+
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02}:{seconds:02}"
+    return f"{minutes}:{seconds:02}"
+
+
+# Reports on pages as they come back to the parent process. Output is buffered
+# and written at most once per interval (or once the buffer fills up), so even
+# in verbose mode a large build makes a handful of writes rather than one per
+# page, and progress mode only ever prints throughput and ETA.
+class Reporter:
+    def __init__(
+        self,
+        mode: str = "progress",
+        stream: TextIO = None,
+        interval: float = 1.0,
+        buffer_size: int = 1000,
+    ):
+        if mode not in OUTPUT_MODES:
+            raise ValueError(f"Unknown output mode '{mode}'")
+        self.mode = mode
+        self.stream = stream or sys.stdout
+        self.interval = interval
+        self.buffer_size = buffer_size
+        # a terminal gets one progress line redrawn in place
+        self.tty = getattr(self.stream, "isatty", lambda: False)()
+        self.buffer: List[str] = []
+        self.total = 0
+        self.done = 0
+        self.start_time = self.last_report = time.perf_counter()
+
+    def start(self, total: int) -> None:
+        self.total = total
+        self.done = 0
+        self.start_time = self.last_report = time.perf_counter()
+        if self.mode == "json":
+            self.write_json({"event": "start", "pages": total})
+
+    def page(self, page) -> None:
+        self.done += 1
+        if self.mode == "verbose":
+            self.buffer.append(
+                f"Generated {page.dest} from {page.source}"
+                f" in {page.seconds * 1000:.1f} ms\n"
+            )
+        elif self.mode == "json":
+            self.write_json(
+                {
+                    "event": "page",
+                    "source": page.source,
+                    "dest": page.dest,
+                    "seconds": round(page.seconds, 6),
+                    "bytes": page.size,
+                }
+            )
+
+        now = time.perf_counter()
+        if now - self.last_report >= self.interval:
+            self.report(now)
+        elif len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def rate(self, now: float) -> float:
+        elapsed = now - self.start_time
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def report(self, now: float) -> None:
+        self.last_report = now
+        rate = self.rate(now)
+        remaining = (self.total - self.done) / rate if rate else 0.0
+        if self.mode == "progress":
+            filled = BAR_WIDTH * self.done // self.total if self.total else BAR_WIDTH
+            line = (
+                f"[{'#' * filled}{' ' * (BAR_WIDTH - filled)}]"
+                f" {self.done}/{pages(self.total)}, {rate:.0f} pages/s,"
+                f" ETA {format_duration(remaining)}"
+            )
+            self.buffer.append(f"\r{line}" if self.tty else f"{line}\n")
+        elif self.mode == "json":
+            self.write_json(
+                {
+                    "event": "progress",
+                    "done": self.done,
+                    "total": self.total,
+                    "pages_per_second": round(rate, 1),
+                    "eta_seconds": round(remaining, 1),
+                }
+            )
+        self.flush()
+
+    def finish(self) -> None:
+        now = time.perf_counter()
+        elapsed = now - self.start_time
+        rate = self.rate(now)
+        if self.mode == "json":
+            self.write_json(
+                {
+                    "event": "finish",
+                    "pages": self.done,
+                    "seconds": round(elapsed, 3),
+                    "pages_per_second": round(rate, 1),
+                }
+            )
+        elif self.mode != "quiet":
+            if self.mode == "progress" and self.tty and self.done:
+                self.buffer.append("\n")
+            self.buffer.append(
+                f"Generated {pages(self.done)} in {elapsed:.2f}s"
+                f" ({rate:.0f} pages/s)\n"
+            )
+        self.flush()
+
+    def write_json(self, event: dict) -> None:
+        self.buffer.append(json.dumps(event) + "\n")
+
+    def flush(self) -> None:
+        if self.buffer:
+            self.stream.write("".join(self.buffer))
+            self.stream.flush()
+            self.buffer.clear()
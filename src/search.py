@@ -0,0 +1,107 @@
+import json
+import os
+import re
+import shutil
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+WORD_RE = re.compile(r"\w{2,}")
+OTHER_SHARD = "_"
+
+
+def page_terms(texts: Iterable[str]) -> List[str]:
+    terms = set()
+    for text in texts:
+        terms.update(WORD_RE.findall(text.lower()))
+    return sorted(terms)
+
+
+def shard_key(term: str, prefix_length: int) -> str:
+    prefix = term[:prefix_length]
+    if prefix.isascii() and prefix.isalnum():
+        return prefix
+    return OTHER_SHARD
+
+
+# Postings are spooled to disk per shard as pages are added and only gathered
+# into the final shard files by close(), so memory is bounded by the spool
+# buffer and the largest single shard rather than by the size of the site.
+class SearchIndex:
+    def __init__(
+        self,
+        public_dir: str,
+        prefix_length: int = 2,
+        buffer_size: int = 50_000,
+    ):
+        self.out_dir = os.path.join(public_dir, "search")
+        self.shard_dir = os.path.join(self.out_dir, "shards")
+        self.spool_dir = os.path.join(self.out_dir, ".spool")
+        self.prefix_length = prefix_length
+        self.buffer_size = buffer_size
+        self.page_count = 0
+        self.buffered = 0
+        self.buffers: Dict[str, List[str]] = defaultdict(list)
+
+        os.makedirs(self.shard_dir, exist_ok=True)
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self.pages_file = open(os.path.join(self.out_dir, "pages.json"), "w")
+        self.pages_file.write("[")
+
+    def add_page(self, url: str, title: str, terms: Iterable[str]) -> int:
+        page_id = self.page_count
+        self.page_count += 1
+
+        separator = "," if page_id else ""
+        self.pages_file.write(separator + json.dumps([url, title]))
+
+        for term in terms:
+            self.buffers[shard_key(term, self.prefix_length)].append(
+                f"{term}\t{page_id}\n"
+            )
+            self.buffered += 1
+        if self.buffered >= self.buffer_size:
+            self.flush()
+
+        return page_id
+
+    def flush(self) -> None:
+        for shard, lines in self.buffers.items():
+            with open(os.path.join(self.spool_dir, shard), "a") as spool:
+                spool.writelines(lines)
+        self.buffers.clear()
+        self.buffered = 0
+
+    def abort(self) -> None:
+        # for a failed build: no index is written and the spool is removed
+        self.pages_file.close()
+        shutil.rmtree(self.spool_dir, ignore_errors=True)
+
+    def close(self) -> None:
+        self.flush()
+        self.pages_file.write("]")
+        self.pages_file.close()
+
+        shards = sorted(os.listdir(self.spool_dir))
+        for shard in shards:
+            spool_path = os.path.join(self.spool_dir, shard)
+            postings = defaultdict(list)
+            with open(spool_path) as spool:
+                for line in spool:
+                    term, page_id = line.rstrip("\n").split("\t")
+                    postings[term].append(int(page_id))
+            with open(os.path.join(self.shard_dir, f"{shard}.json"), "w") as output:
+                json.dump(postings, output, separators=(",", ":"), sort_keys=True)
+            os.remove(spool_path)
+        os.rmdir(self.spool_dir)
+
+        with open(os.path.join(self.out_dir, "index.json"), "w") as manifest:
+            json.dump(
+                {
+                    "pages": self.page_count,
+                    "prefix_length": self.prefix_length,
+                    "other_shard": OTHER_SHARD,
+                    "shards": shards,
+                },
+                manifest,
+                separators=(",", ":"),
+            )
@@ -0,0 +1,149 @@
+import hashlib
+import heapq
+import json
+import os
+import shutil
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+MANIFEST_NAME = ".shard-manifest.jsonl"
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    # "i/N" -> (i, N) with 0 <= i < N
+    index, _, count = spec.partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"Invalid shard '{spec}', expected i/N") from None
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard '{spec}', expected 0 <= i < N")
+    return index, count
+
+
+def shard_of(rel_path: str, count: int) -> int:
+    # stable across machines and Python runs, unlike hash()
+    key = rel_path.replace(os.sep, "/").encode()
+    return int.from_bytes(hashlib.sha1(key).digest()[:8], "big") % count
+
+
+# Records every page a shard rendered, in walk order, with what the search
+# index and site index need, so merge_shards can rebuild the site-wide outputs
+# exactly as a single-node build would have written them. The first line is
+# the shard's [index, count] and the second the image props fragments on the
+# listings need.
+class ShardManifest:
+    def __init__(
+        self,
+        public_dir: str,
+        shard: Tuple[int, int],
+        images: Dict[str, Dict[str, str]] = None,
+    ):
+        self.file = open(os.path.join(public_dir, MANIFEST_NAME), "w")
+        self.file.write(json.dumps(list(shard)) + "\n")
+        self.file.write(json.dumps(images) + "\n")
+
+    def add(
+        self,
+        order: int,
+        url: str,
+        title: str,
+        mtime: float,
+        terms: List[str],
+        tags: Tuple[str, ...] = (),
+    ):
+        self.file.write(json.dumps([order, url, title, mtime, terms, tags]) + "\n")
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def read_shard(shard_dir: str) -> Tuple[int, int]:
+    try:
+        with open(os.path.join(shard_dir, MANIFEST_NAME)) as manifest:
+            index, count = json.loads(manifest.readline())
+    except (OSError, ValueError):
+        raise ValueError(f"{shard_dir} has no shard manifest") from None
+    return index, count
+
+
+def check_shards(shard_dirs: List[str]) -> None:
+    # a missing or repeated shard would silently drop or duplicate pages
+    shards = [read_shard(shard_dir) for shard_dir in shard_dirs]
+    count = shards[0][1]
+    if sorted(shards) != [(index, count) for index in range(count)]:
+        found = ", ".join(f"{index}/{total}" for index, total in shards)
+        raise ValueError(
+            f"Expected each of shards 0-{count - 1} of {count} once, got {found}"
+        )
+
+
+def read_images(shard_dir: str) -> Dict[str, Dict[str, str]]:
+    with open(os.path.join(shard_dir, MANIFEST_NAME)) as manifest:
+        next(manifest)
+        return json.loads(next(manifest))
+
+
+def read_manifest(shard_dir: str) -> Iterator[list]:
+    with open(os.path.join(shard_dir, MANIFEST_NAME)) as manifest:
+        next(manifest)
+        next(manifest)
+        for line in manifest:
+            yield json.loads(line)
+
+
+def copy_shard(shard_dir: str, public_dir: str) -> None:
+    # every shard carries the same static output, so the first copy wins
+    for root, dirs, files in os.walk(shard_dir):
+        dirs.sort()
+        dest_root = os.path.join(public_dir, os.path.relpath(root, shard_dir))
+        os.makedirs(dest_root, exist_ok=True)
+        for name in sorted(files):
+            dest_path = os.path.join(dest_root, name)
+            if name == MANIFEST_NAME and root == shard_dir:
+                continue
+            if not os.path.exists(dest_path):
+                shutil.copy(os.path.join(root, name), dest_path)
+
+
+def merge_shards(
+    shard_dirs: List[str],
+    public_dir: str,
+    template_path: str,
+    base_url: str,
+    minify: bool = False,
+    archives: Sequence[str] = (),
+    per_page: int = 20,
+) -> None:
+    from aggregate import SiteIndex
+    from main import reset_output
+    from search import SearchIndex
+
+    check_shards(shard_dirs)
+    reset_output(public_dir)
+    for shard_dir in shard_dirs:
+        copy_shard(shard_dir, public_dir)
+
+    # each manifest is already in walk order, so a k-way merge restores the
+    # single-node page order while holding one record per shard in memory
+    search_index = SearchIndex(public_dir)
+    site_index = SiteIndex()
+    try:
+        for _, url, title, mtime, terms, tags in heapq.merge(
+            *[read_manifest(shard_dir) for shard_dir in shard_dirs]
+        ):
+            search_index.add_page(url, title, terms)
+            site_index.add(url, title, mtime, tuple(tags))
+    except BaseException:
+        search_index.abort()
+        raise
+    search_index.close()
+    site_index.write(
+        public_dir,
+        template_path,
+        base_url,
+        minify=minify,
+        archives=archives,
+        per_page=per_page,
+        # every shard processed the same static directory
+        images=read_images(shard_dirs[0]),
+    )
@@ -0,0 +1,180 @@
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, List, Sequence
+
+from config import BASE_URL, STATIC_DIR, TEMPLATE_FILE
+from main import build_pages, build_static, reset_output, stage
+from metrics import Metrics
+
+
+class Site:
+    def __init__(
+        self,
+        name: str,
+        content_dir: str,
+        public_dir: str,
+        static_dir: str = STATIC_DIR,
+        template_path: str = TEMPLATE_FILE,
+        base_url: str = BASE_URL,
+    ):
+        self.name = name
+        self.content_dir = content_dir
+        self.public_dir = public_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.base_url = base_url
+
+    def __repr__(self):
+        return f'Site(name="{self.name}", public_dir="{self.public_dir}")'
+
+
+def load_sites(config_path: str) -> List[Site]:
+    # {"sites": [{"name": "en", "content": "content/en", "public": "public/en",
+    #   "static": "static", "template": "template.html", "base_url": "..."}]}
+    # with paths relative to the config file; static and template are optional
+    with open(config_path) as config_file:
+        config = json.load(config_file)
+
+    root = os.path.dirname(os.path.abspath(config_path))
+
+    def path(value: str) -> str:
+        return os.path.normpath(os.path.join(root, value))
+
+    sites = []
+    for entry in config["sites"]:
+        sites.append(
+            Site(
+                entry["name"],
+                path(entry["content"]),
+                path(entry["public"]),
+                path(entry["static"]) if "static" in entry else STATIC_DIR,
+                path(entry["template"]) if "template" in entry else TEMPLATE_FILE,
+                entry.get("base_url", BASE_URL),
+            )
+        )
+
+    # each site's output is wiped before it is built, so outputs can't overlap
+    for index, site in enumerate(sites):
+        for other in sites[index + 1 :]:
+            if os.path.commonpath([site.public_dir, other.public_dir]) in (
+                site.public_dir,
+                other.public_dir,
+            ):
+                raise ValueError(
+                    f"Site outputs overlap: {site.public_dir} and {other.public_dir}"
+                )
+    return sites
+
+
+def link_tree(src_dir: str, dst_dir: str, metrics: Metrics = None) -> None:
+    # hard links share one copy of each file on disk; copy when the two
+    # directories can't share inodes (different filesystems, no support)
+    for root, dirs, files in os.walk(src_dir):
+        dirs.sort()
+        dest_root = os.path.join(dst_dir, os.path.relpath(root, src_dir))
+        os.makedirs(dest_root, exist_ok=True)
+        for name in sorted(files):
+            try:
+                os.link(os.path.join(root, name), os.path.join(dest_root, name))
+                action = "linked"
+            except OSError:
+                shutil.copy(os.path.join(root, name), os.path.join(dest_root, name))
+                action = "copied"
+            if metrics is not None:
+                metrics.inc("ssg_static_files_total", action=action)
+
+
+def _build_site_pages(
+    site: Site,
+    images: Dict[str, Dict[str, str]],
+    cache_dir: str,
+    jobs: int,
+    highlighter: str,
+    output: str,
+    drafts: bool,
+    minify: bool,
+    archives: Sequence[str],
+    per_page: int,
+) -> Metrics:
+    # a fresh Metrics per site, returned so worker processes can report back
+    metrics = Metrics()
+    build_pages(
+        site.content_dir,
+        site.template_path,
+        site.public_dir,
+        cache_dir,
+        site.base_url,
+        jobs,
+        highlighter,
+        images,
+        metrics=metrics,
+        output=output,
+        drafts=drafts,
+        minify=minify,
+        archives=archives,
+        per_page=per_page,
+    )
+    return metrics
+
+
+# Static assets are built once per distinct static directory and hard linked
+# into every other site using it, before any pages are written. Pages for each
+# site are then rendered in parallel, all sharing the on-disk parse and
+# highlight caches so content common to several locales is only parsed once.
+def build_sites(
+    sites: List[Site],
+    cache_dir: str,
+    jobs: int = 1,
+    highlighter: str = "pygments",
+    metrics: Metrics = None,
+    output: str = "progress",
+    drafts: bool = False,
+    minify: bool = False,
+    archives: Sequence[str] = (),
+    per_page: int = 20,
+) -> None:
+    metrics = metrics if metrics is not None else Metrics()
+    static_outputs = {}
+    site_images = []
+    for site in sites:
+        reset_output(site.public_dir)
+        if site.static_dir in static_outputs:
+            first_public_dir, images = static_outputs[site.static_dir]
+            with stage(metrics, "static"):
+                link_tree(first_public_dir, site.public_dir, metrics)
+        else:
+            with stage(metrics, "static"):
+                images = build_static(
+                    site.static_dir,
+                    site.public_dir,
+                    cache_dir,
+                    jobs,
+                    highlighter,
+                    metrics,
+                )
+            static_outputs[site.static_dir] = (site.public_dir, images)
+        site_images.append(images)
+
+    # sites render side by side, and jobs left over split among their pages
+    site_jobs = max(min(jobs, len(sites)), 1)
+    render = partial(
+        _build_site_pages,
+        cache_dir=cache_dir,
+        jobs=max(jobs // site_jobs, 1),
+        highlighter=highlighter,
+        output=output,
+        drafts=drafts,
+        minify=minify,
+        archives=archives,
+        per_page=per_page,
+    )
+    if site_jobs > 1:
+        with ProcessPoolExecutor(site_jobs) as pool:
+            site_metrics = list(pool.map(render, sites, site_images))
+    else:
+        site_metrics = list(map(render, sites, site_images))
+    for other in site_metrics:
+        metrics.merge(other)
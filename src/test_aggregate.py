@@ -0,0 +1,191 @@
+import os
+import tempfile
+import unittest
+
+from aggregate import (
+    SiteIndex,
+    parent_url,
+    rss_xml,
+    section_url,
+    sitemap_xml,
+    url_to_path,
+)
+
+
+class TestURLs(unittest.TestCase):
+    def test_parent_of_page(self):
+        self.assertEqual(parent_url("/blog/post.html"), "/blog/")
+
+    def test_parent_of_directory(self):
+        self.assertEqual(parent_url("/blog/2024/"), "/blog/")
+
+    def test_parent_of_root(self):
+        self.assertEqual(parent_url("/"), "")
+
+    def test_url_to_path(self):
+        self.assertEqual(url_to_path("/public", "/blog/"), "/public/blog/index.html")
+        self.assertEqual(url_to_path("/public", "/a/b.html"), "/public/a/b.html")
+
+    def test_section_url(self):
+        self.assertEqual(section_url("blog"), "/blog/")
+        self.assertEqual(section_url("/blog/"), "/blog/")
+        self.assertEqual(section_url("/"), "/")
+
+
+class TestFeeds(unittest.TestCase):
+    pages = [("/", "Home", 0.0), ("/news/", "News & Notes", 86400.0)]
+
+    def test_sitemap(self):
+        xml = sitemap_xml(self.pages, "https://example.com")
+        self.assertIn(
+            "<url><loc>https://example.com/news/</loc><lastmod>1970-01-02</lastmod></url>",
+            xml,
+        )
+
+    def test_rss_newest_first(self):
+        xml = rss_xml(self.pages, "https://example.com", "Site", 20)
+        self.assertLess(xml.index("News &amp; Notes"), xml.index("<title>Home"))
+        self.assertIn("<lastBuildDate>Fri, 02 Jan 1970 00:00:00 GMT", xml)
+
+    def test_rss_limit(self):
+        xml = rss_xml(self.pages, "https://example.com", "Site", 1)
+        self.assertEqual(xml.count("<item>"), 1)
+
+
+class TestSiteIndex(unittest.TestCase):
+    def test_listings_for_directories_without_index(self):
+        site_index = SiteIndex()
+        site_index.add("/", "Home", 0.0)
+        site_index.add("/blog/2024/first.html", "First", 0.0)
+        site_index.add("/blog/2024/second.html", "Second", 0.0)
+        site_index.add("/docs/", "Docs", 0.0)
+        site_index.add("/docs/api.html", "API", 0.0)
+
+        self.assertEqual(
+            site_index.listings(),
+            {
+                "/blog/": [("/blog/2024/", "2024")],
+                "/blog/2024/": [
+                    ("/blog/2024/first.html", "First"),
+                    ("/blog/2024/second.html", "Second"),
+                ],
+            },
+        )
+
+    def test_tag_pages(self):
+        site_index = SiteIndex()
+        site_index.add("/a.html", "A", 0.0, ("Python", "web"))
+        site_index.add("/b.html", "B", 0.0, ("python",))
+        self.assertEqual(
+            site_index.tag_pages(),
+            {
+                "/tags/python/": (
+                    "Tagged Python",
+                    [("/a.html", "A"), ("/b.html", "B")],
+                ),
+                "/tags/web/": ("Tagged web", [("/a.html", "A")]),
+                "/tags/": (
+                    "Tags",
+                    [("/tags/python/", "Python"), ("/tags/web/", "web")],
+                ),
+            },
+        )
+
+    def test_write(self):
+        with tempfile.TemporaryDirectory() as public_dir:
+            template_path = os.path.join(public_dir, "template.html")
+            with open(template_path, "w") as template:
+                template.write("<title>{{ Title }}</title>{{ Content }}")
+
+            site_index = SiteIndex()
+            site_index.add("/", "Home", 0.0)
+            site_index.add("/blog/post.html", "Post", 0.0, ("news",))
+            site_index.write(public_dir, template_path, "https://example.com/")
+
+            self.assertTrue(os.path.exists(os.path.join(public_dir, "sitemap.xml")))
+            with open(os.path.join(public_dir, "rss.xml")) as feed:
+                self.assertIn("<title>Home</title>", feed.read())
+            with open(os.path.join(public_dir, "blog", "index.html")) as listing:
+                self.assertEqual(
+                    listing.read(),
+                    "<title>Index of /blog/</title><div><h1>Index of /blog/</h1>"
+                    '<ul><li><a href="/blog/post.html">Post</a></li></ul></div>',
+                )
+            with open(os.path.join(public_dir, "tags", "news", "index.html")) as tag:
+                self.assertIn('<a href="/blog/post.html">Post</a>', tag.read())
+
+
+class TestArchive(unittest.TestCase):
+    def setUp(self):
+        self.site_index = SiteIndex()
+        self.site_index.add("/blog/", "Blog", 0.0)
+        for day in range(5):
+            self.site_index.add(f"/blog/post{day}.html", f"Post {day}", day * 86400.0)
+        self.site_index.add("/about.html", "About", 0.0)
+
+    def test_pages_newest_first(self):
+        pages = list(self.site_index.archive_pages("/blog/", 2))
+        self.assertEqual(
+            [(url, [title for _, title in entries]) for url, _, entries, _ in pages],
+            [
+                ("/blog/archive/", ["Post 4", "Post 3"]),
+                ("/blog/archive/page/2/", ["Post 2", "Post 1"]),
+                ("/blog/archive/page/3/", ["Post 0"]),
+            ],
+        )
+        self.assertEqual(pages[0][1], "Archive of /blog/ (1/3)")
+        self.assertEqual(pages[0][3], [("/blog/archive/page/2/", "Older")])
+        self.assertEqual(
+            pages[1][3],
+            [("/blog/archive/", "Newer"), ("/blog/archive/page/3/", "Older")],
+        )
+
+    def test_single_page(self):
+        pages = list(self.site_index.archive_pages("/blog/", 20))
+        self.assertEqual(len(pages), 1)
+        self.assertEqual(pages[0][1], "Archive of /blog/")
+        self.assertEqual(len(pages[0][2]), 5)
+        self.assertEqual(pages[0][3], [])
+
+    def test_empty_section(self):
+        self.assertEqual(list(self.site_index.archive_pages("/news/", 2)), [])
+        self.site_index.add("/about/", "About", 0.0)
+        self.assertEqual(list(self.site_index.archive_pages("/about/", 2)), [])
+
+    def test_pages_are_lazy(self):
+        pages = self.site_index.archive_pages("/blog/", 2)
+        url, _, entries, _ = next(pages)
+        self.assertEqual((url, len(entries)), ("/blog/archive/", 2))
+
+    def test_write(self):
+        with tempfile.TemporaryDirectory() as public_dir:
+            template_path = os.path.join(public_dir, "template.html")
+            with open(template_path, "w") as template:
+                template.write("{{ Content }}{{ Footer }}")
+            fragment_dir = os.path.join(public_dir, "fragments")
+            os.mkdir(fragment_dir)
+            with open(os.path.join(fragment_dir, "footer.md"), "w") as footer:
+                footer.write("Footer")
+            self.site_index.add("/blog/archive/page/3/", "Custom", 0.0)
+            self.site_index.write(
+                public_dir, template_path, "", archives=["blog", "news"], per_page=2
+            )
+
+            path = os.path.join(public_dir, "blog", "archive", "page", "2")
+            with open(os.path.join(path, "index.html")) as archive:
+                html = archive.read()
+            self.assertIn('<a href="/blog/post2.html">Post 2</a>', html)
+            self.assertIn(
+                '<nav><a href="/blog/archive/">Newer</a>'
+                '<a href="/blog/archive/page/3/">Older</a></nav>',
+                html,
+            )
+            self.assertTrue(html.endswith("<div><p>Footer</p></div>"))
+            self.assertFalse(os.path.exists(os.path.join(public_dir, "news")))
+            # content pages win over archive pages at the same url
+            path = os.path.join(public_dir, "blog", "archive", "page", "3")
+            self.assertFalse(os.path.exists(os.path.join(path, "index.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
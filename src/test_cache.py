@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+
+from cache import ParseCache, decode_blocks, encode_blocks
+from generate import render_blocks
+from parse import PARSER_VERSION, parse_markdown
+
+MARKDOWN = """# A **bold** heading
+
+> a quote with a [link](https://www.boot.dev)
+
+- one
+- ![two](/two.png)
+  - nested
+
+    with a second paragraph
+
+9. first
+10. *second*
+
+```
+code
+```
+
+A plain paragraph"""
+
+
+class TestEncoding(unittest.TestCase):
+    def test_round_trip(self):
+        blocks = parse_markdown(MARKDOWN)
+        decoded = decode_blocks(encode_blocks(blocks))
+        self.assertEqual(
+            render_blocks(decoded).to_html(), render_blocks(blocks).to_html()
+        )
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_miss_then_hit(self):
+        cache = ParseCache(self.tmp.name)
+        first = cache.parse(MARKDOWN)
+        second = cache.parse(MARKDOWN)
+
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(
+            render_blocks(first).to_html(), render_blocks(second).to_html()
+        )
+
+    def test_shared_between_instances(self):
+        ParseCache(self.tmp.name).parse(MARKDOWN)
+        cache = ParseCache(self.tmp.name)
+        cache.parse(MARKDOWN)
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+
+    def test_content_change_misses(self):
+        cache = ParseCache(self.tmp.name)
+        cache.parse(MARKDOWN)
+        cache.parse(MARKDOWN + " changed")
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+    def test_corrupt_entry_reparsed(self):
+        cache = ParseCache(self.tmp.name)
+        cache.parse(MARKDOWN)
+        with open(cache.path(MARKDOWN), "wb") as entry:
+            entry.write(b"not marshal data")
+        cache.parse(MARKDOWN)
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+    def test_old_parser_version_removed(self):
+        stale = os.path.join(self.tmp.name, "ast", f"v{PARSER_VERSION - 1}")
+        os.makedirs(stale)
+        ParseCache(self.tmp.name)
+        self.assertFalse(os.path.exists(stale))
+
+
+if __name__ == "__main__":
+    unittest.main()
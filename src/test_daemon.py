@@ -0,0 +1,48 @@
+import os
+import socketserver
+import threading
+import unittest
+
+from daemon import BuildHandler, request_build
+from fixtures import SiteTestCase
+
+
+class TestBuildDaemon(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.paths["output"] = "quiet"
+        self.write_page("index.md", "# Home\n\nWelcome")
+        self.write_template("<h1>{{ Title }}</h1>{{ Content }}")
+
+        self.socket_path = os.path.join(self.root, "build.sock")
+        self.server = socketserver.UnixStreamServer(self.socket_path, BuildHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_build(self):
+        response = request_build(self.socket_path, **self.paths)
+        self.assertTrue(response["ok"])
+
+        with open(os.path.join(self.paths["public_dir"], "index.html")) as page:
+            self.assertEqual(
+                page.read(), "<h1>Home</h1><div><h1>Home</h1><p>Welcome</p></div>"
+            )
+
+    def test_repeated_builds(self):
+        for _ in range(3):
+            self.assertTrue(request_build(self.socket_path, **self.paths)["ok"])
+
+    def test_build_error(self):
+        paths = dict(self.paths, content_dir=os.path.join(self.root, "missing"))
+        response = request_build(self.socket_path, **paths)
+        self.assertFalse(response["ok"])
+        self.assertIn("FileNotFoundError", response["error"])
+        spool_dir = os.path.join(self.paths["public_dir"], "search", ".spool")
+        self.assertFalse(os.path.exists(spool_dir))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+from escape import escape_attr, escape_text
+from generate import LeafNode, ParentNode
+
+
+class TestEscapeText(unittest.TestCase):
+    def test_plain_text_unchanged(self):
+        text = "Nothing special here"
+        self.assertIs(escape_text(text), text)
+
+    def test_special_characters(self):
+        self.assertEqual(escape_text("a < b && c > d"), "a &lt; b &amp;&amp; c &gt; d")
+
+    def test_quotes_left_alone(self):
+        self.assertEqual(escape_text('"quoted" \'text\''), '"quoted" \'text\'')
+
+    def test_entity_escaped_once(self):
+        self.assertEqual(escape_text("&amp;"), "&amp;amp;")
+
+
+class TestEscapeAttr(unittest.TestCase):
+    def test_plain_value_unchanged(self):
+        value = "https://www.boot.dev"
+        self.assertIs(escape_attr(value), value)
+
+    def test_quote_in_url(self):
+        self.assertEqual(
+            escape_attr('https://example.com/?q="x"&y=<z>'),
+            "https://example.com/?q=&quot;x&quot;&amp;y=&lt;z&gt;",
+        )
+
+
+class TestEscapedHTML(unittest.TestCase):
+    def test_leaf_value(self):
+        node = LeafNode("code", "if a < b:")
+        self.assertEqual(node.to_html(), "<code>if a &lt; b:</code>")
+
+    def test_leaf_props(self):
+        node = LeafNode("a", "link", {"href": 'https://x.com/"><script>'})
+        self.assertEqual(
+            node.to_html(), '<a href="https://x.com/&quot;&gt;&lt;script&gt;">link</a>'
+        )
+
+    def test_parent_children(self):
+        node = ParentNode("p", [LeafNode(None, "fish & chips"), LeafNode("b", "<b>")])
+        self.assertEqual(node.to_html(), "<p>fish &amp; chips<b>&lt;b&gt;</b></p>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import re
+import tempfile
+import unittest
+
+from frontmatter import (
+    Metadata,
+    date_timestamp,
+    parse_value,
+    scan_metadata,
+    split_front_matter,
+)
+
+
+class TestParseValue(unittest.TestCase):
+    def test_values(self):
+        self.assertEqual(parse_value(' "quoted: yes" '), "quoted: yes")
+        self.assertEqual(parse_value("bare words"), "bare words")
+        self.assertEqual(parse_value("true"), True)
+        self.assertEqual(parse_value("['a', b]"), ["a", "b"])
+        self.assertEqual(parse_value("[]"), [])
+
+
+class TestSplitFrontMatter(unittest.TestCase):
+    def test_yaml(self):
+        metadata, body = split_front_matter(
+            "---\ntitle: Hello\ndate: 2024-05-01\ndraft: true\n"
+            "tags: [python, web]\n---\n\n# Heading\n\nText"
+        )
+        self.assertEqual(
+            metadata,
+            Metadata("Hello", "2024-05-01", True, None, ("python", "web")),
+        )
+        self.assertEqual(body, "# Heading\n\nText")
+
+    def test_yaml_block_list(self):
+        metadata, _ = split_front_matter(
+            "---\ntemplate: post.html\ntags:\n  - one\n  - two\n---\n# Heading"
+        )
+        self.assertEqual(metadata.template, "post.html")
+        self.assertEqual(metadata.tags, ("one", "two"))
+
+    def test_toml(self):
+        metadata, body = split_front_matter(
+            '+++\ntitle = "Hello"\ndraft = false\ntags = ["a", "b"]\n+++\n# Heading'
+        )
+        self.assertEqual(metadata, Metadata("Hello", None, False, None, ("a", "b")))
+        self.assertEqual(body, "# Heading")
+
+    def test_no_front_matter(self):
+        markdown = "# Heading\n\n---\n\nText"
+        self.assertEqual(split_front_matter(markdown), (Metadata(), markdown))
+
+    def test_unterminated_is_thematic_break(self):
+        markdown = "---\n\nText after a rule"
+        self.assertEqual(split_front_matter(markdown), (Metadata(), markdown))
+
+    def test_invalid_line(self):
+        self.assertRaises(ValueError, split_front_matter, "---\nnot a field\n---\n")
+
+    def test_invalid_date(self):
+        with self.assertRaisesRegex(ValueError, "Invalid date 'yesterday'"):
+            split_front_matter("---\ndate: yesterday\n---\n")
+
+
+class TestScanMetadata(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "page.md")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, data: bytes):
+        with open(self.path, "wb") as page:
+            page.write(data)
+
+    def test_reads_only_header(self):
+        # the end of the body isn't valid UTF-8, so reading it all would fail
+        self.write(
+            b"---\ntitle: Fast\ndraft: true\n---\n\n# Heading\n"
+            + b"text " * 100_000
+            + b"\xff\xfe"
+        )
+        self.assertEqual(scan_metadata(self.path), Metadata("Fast", draft=True))
+
+    def test_title_from_heading(self):
+        self.write(b"---\ntags: news\n---\n\n# From Heading\n\nText")
+        self.assertEqual(
+            scan_metadata(self.path), Metadata("From Heading", tags=("news",))
+        )
+
+    def test_error_names_file(self):
+        self.write(b"+++\ntitle\n+++\n# Heading")
+        pattern = f"^{re.escape(self.path)}: Invalid front matter"
+        with self.assertRaisesRegex(ValueError, pattern):
+            scan_metadata(self.path)
+
+    def test_thematic_break(self):
+        self.write(b"---\n\n# Not a title")
+        self.assertEqual(scan_metadata(self.path), Metadata())
+
+    def test_without_front_matter(self):
+        self.write(b"# Plain\n\nText")
+        self.assertEqual(scan_metadata(self.path), Metadata("Plain"))
+
+
+class TestDateTimestamp(unittest.TestCase):
+    def test_date(self):
+        self.assertEqual(date_timestamp("1970-01-02"), 86400.0)
+
+    def test_datetime_with_offset(self):
+        self.assertEqual(date_timestamp("1970-01-02T01:00:00+01:00"), 86400.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,15 +1,28 @@
+import os
+import re
+import tempfile
 import unittest
 
+from aggregate import SiteIndex
+from fixtures import SiteTestCase
 from generate import (
     HTMLNode,
     LeafNode,
     ParentNode,
     code_to_html,
+    compile_template,
+    generate_page,
+    generate_pages_recursive,
     heading_to_html,
+    load_fragment,
     markdown_to_html_node,
+    minify_markup,
     ordered_to_html,
+    page_url,
     paragraph_to_html,
     quote_to_html,
+    render_template,
+    static_node,
     text_node_to_html_node,
     unordered_to_html,
 )
@@ -206,6 +219,11 @@ class TestUnorderedToHTML(unittest.TestCase):
         self.assertEqual(html_nodes, expected_html_nodes)
 
 
+    def test_not_a_list(self):
+        self.assertRaises(ValueError, unordered_to_html, "just a paragraph")
+        self.assertRaises(ValueError, unordered_to_html, "- a\n\n1. b")
+
+
 class TestOrderedToHTML(unittest.TestCase):
     def test_two_items(self):
         block = "1. this is an\n2. ordered list"
@@ -231,6 +249,39 @@ class TestOrderedToHTML(unittest.TestCase):
         )
         self.assertEqual(html_nodes, expected_html_nodes)
 
+    def test_not_a_list(self):
+        self.assertRaises(ValueError, ordered_to_html, "- unordered")
+
+
+class TestNestedBlocksToHTML(unittest.TestCase):
+    def test_nested_list(self):
+        html = markdown_to_html_node("- a\n  - b\n  - c\n- d").to_html()
+        self.assertEqual(
+            html,
+            "<div><ul><li>a<ul><li>b</li><li>c</li></ul></li><li>d</li></ul></div>",
+        )
+
+    def test_multi_paragraph_item(self):
+        html = markdown_to_html_node("1. one\n\n   more\n2. two").to_html()
+        self.assertEqual(
+            html, "<div><ol><li><p>one</p><p>more</p></li><li>two</li></ol></div>"
+        )
+
+    def test_ordered_start(self):
+        html = markdown_to_html_node("9. a\n10. b").to_html()
+        self.assertEqual(html, '<div><ol start="9"><li>a</li><li>b</li></ol></div>')
+
+    def test_code_in_list_item(self):
+        html = markdown_to_html_node("- item\n\n  ```\n  code\n  ```").to_html()
+        self.assertEqual(
+            html, "<div><ul><li>item<pre><code>code\n</code></pre></li></ul></div>"
+        )
+
+
+    def test_thematic_break(self):
+        html = markdown_to_html_node("Text\n* * *\n- ***").to_html()
+        self.assertEqual(html, "<div><p>Text</p><hr><ul><li><hr></li></ul></div>")
+
 
 class TestCodeToHTML(unittest.TestCase):
     def test_code(self):
@@ -291,3 +342,221 @@ class TestParagraphToHTML(unittest.TestCase):
             ],
         )
         self.assertEqual(html_nodes, expected_html_nodes)
+
+
+class TestTemplate(unittest.TestCase):
+    def test_compile(self):
+        compiled = compile_template("<title>{{ Title }}</title>{{ Content }}")
+        self.assertEqual(compiled, ["<title>", "Title", "</title>", "Content", ""])
+
+    def test_render(self):
+        compiled = compile_template("<title>{{ Title }}</title>{{ Content }}")
+        html = render_template(compiled, {"Title": "Home", "Content": "<p>Hi</p>"})
+        self.assertEqual(html, "<title>Home</title><p>Hi</p>")
+
+    def test_render_unknown_placeholder(self):
+        compiled = compile_template("{{ Title }} {{ Footer }}")
+        self.assertEqual(
+            render_template(compiled, {"Title": "Home"}), "Home {{ Footer }}"
+        )
+
+
+class TestMinify(unittest.TestCase):
+    def test_text_collapsed(self):
+        node = ParentNode("p", [LeafNode(None, "two\n  lines "), LeafNode("b", "x")])
+        self.assertEqual(node.to_html(minify=True), "<p>two lines <b>x</b></p>")
+
+    def test_pre_preserved(self):
+        node = markdown_to_html_node("Some\ntext\n\n```\nif x:\n    y\n```")
+        self.assertEqual(
+            node.to_html(minify=True),
+            "<div><p>Some text</p><pre><code>if x:\n    y\n</code></pre></div>",
+        )
+
+    def test_template(self):
+        compiled = compile_template(
+            "<html>\n  <title> {{ Title }} </title>\n  <body>\n    {{ Content }}\n"
+            "  </body>\n</html>\n",
+            minify=True,
+        )
+        self.assertEqual(
+            compiled,
+            ["<html><title> ", "Title", " </title><body>", "Content", "</body></html>"],
+        )
+
+    def test_markup_keeps_inline_spacing(self):
+        self.assertEqual(
+            minify_markup("<p>by\n  <a>me</a>   and\n  you</p>"),
+            "<p>by <a>me</a> and you</p>",
+        )
+
+    def test_markup_keeps_space_between_inline_siblings(self):
+        self.assertEqual(
+            minify_markup(
+                '<nav>\n  <a href="/">Home</a>\n  <a href="/blog">Blog</a>\n</nav>'
+            ),
+            '<nav> <a href="/">Home</a> <a href="/blog">Blog</a> </nav>',
+        )
+        self.assertEqual(
+            minify_markup("<p>Written by\n  <b>me</b>\n  <i>today</i></p>"),
+            "<p>Written by <b>me</b> <i>today</i></p>",
+        )
+
+    def test_markup_drops_indentation_between_blocks(self):
+        self.assertEqual(
+            minify_markup("\n<ul>\n  <li>a</li>\n  <li>\n    b\n  </li>\n</ul>\n"),
+            "<ul><li>a</li><li> b </li></ul>",
+        )
+
+    def test_markup_preserves_pre_and_script(self):
+        html = "<div>\n  <pre>  a\n  b</pre>\n<script>\n// x\ny()</script>\n</div>"
+        self.assertEqual(
+            minify_markup(html),
+            "<div><pre>  a\n  b</pre><script>\n// x\ny()</script></div>",
+        )
+
+
+class TestFragments(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "nav.md")
+        with open(self.path, "w") as fragment:
+            fragment.write("[Home](/)")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_static_node(self):
+        node = static_node(ParentNode("nav", [LeafNode("a", "Home", {"href": "/"})]))
+        self.assertEqual(node.to_html(), '<nav><a href="/">Home</a></nav>')
+        self.assertEqual(node.text, "Home")
+
+    def test_rendered_once(self):
+        first = load_fragment(self.path)
+        self.assertEqual(first.to_html(), '<div><a href="/">Home</a></div>')
+        self.assertIs(load_fragment(self.path), first)
+
+    def test_invalidated_on_change(self):
+        first = load_fragment(self.path)
+        with open(self.path, "w") as fragment:
+            fragment.write("[Blog](/blog/)")
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        second = load_fragment(self.path)
+        self.assertIsNot(second, first)
+        self.assertIn("/blog/", second.to_html())
+
+    def test_image_props(self):
+        with open(self.path, "w") as fragment:
+            fragment.write("![Logo](/logo.png)")
+        images = {"/logo.png": {"width": "40", "height": "20"}}
+        html = load_fragment(self.path, images=images).to_html()
+        self.assertIn('<img src="/logo.png" alt="Logo" width="40" height="20">', html)
+        other = load_fragment(self.path, images={})
+        self.assertIn('loading="lazy"', other.to_html())
+        self.assertIs(load_fragment(self.path, images={}), other)
+
+
+class TestPageURL(unittest.TestCase):
+    def test_root_index(self):
+        self.assertEqual(page_url("/public", "/public/index.html"), "/")
+
+    def test_nested_index(self):
+        self.assertEqual(page_url("/public", "/public/blog/index.html"), "/blog/")
+
+    def test_page(self):
+        self.assertEqual(
+            page_url("/public", "/public/blog/post.html"), "/blog/post.html"
+        )
+
+
+class TestGeneratePagesRecursive(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        for name in ["index", "a/index", "a/b", "c/d/index"]:
+            self.write_page(f"{name}.md", f"# Page {name}\n\nSome **text**")
+
+    def build(self, public_name, jobs):
+        public_dir = os.path.join(self.root, public_name)
+        os.mkdir(public_dir)
+        site_index = SiteIndex()
+        generate_pages_recursive(
+            self.paths["content_dir"],
+            self.paths["template_path"],
+            public_dir,
+            site_index=site_index,
+            jobs=jobs,
+        )
+        outputs = {}
+        for root, _, files in os.walk(public_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                with open(path) as output:
+                    outputs[os.path.relpath(path, public_dir)] = output.read()
+        return outputs, sorted(url for url, _, _ in site_index.pages)
+
+    def write_fragment(self, name, markdown):
+        self.write_file(os.path.join(self.root, "fragments", name), markdown)
+
+    def test_collects_every_page(self):
+        _, urls = self.build("public", 1)
+        self.assertEqual(urls, ["/", "/a/", "/a/b.html", "/c/d/"])
+
+    def test_parallel_matches_serial(self):
+        self.assertEqual(self.build("serial", 1), self.build("parallel", 2))
+
+    def test_front_matter(self):
+        self.write_page(
+            os.path.join("a", "b.md"),
+            "---\ntitle: From Front Matter\ndate: 2024-05-01\n"
+            "template: other.html\n---\n\n# Heading\n\nText",
+        )
+        self.write_file(
+            os.path.join(self.root, "other.html"), "<h1>{{ Title }}</h1>{{ Content }}"
+        )
+        outputs, _ = self.build("public", 1)
+        self.assertEqual(
+            outputs[os.path.join("a", "b.html")],
+            "<h1>From Front Matter</h1><div><h1>Heading</h1><p>Text</p></div>",
+        )
+
+    def test_fragments(self):
+        self.write_fragment("footer.md", "Footer")
+        self.write_fragment("callout.md", "> Note")
+        self.write_template("{{ Content }}{{ Footer }}{{ Missing }}")
+        self.write_page(
+            os.path.join("a", "b.md"), "# B\n\n{{ Callout }}\n\nText {{ Callout }}"
+        )
+        outputs, _ = self.build("public", 1)
+        self.assertEqual(
+            outputs[os.path.join("a", "b.html")],
+            "<div><h1>B</h1><div><blockquote>Note</blockquote></div>"
+            "<p>Text {{ Callout }}</p></div><div><p>Footer</p></div>{{ Missing }}",
+        )
+
+    def test_fragment_words_not_indexed(self):
+        self.write_fragment("callout.md", "Subscribe")
+        path = self.write_page(
+            os.path.join("a", "b.md"), "# B\n\n{{ Callout }}\n\nText"
+        )
+        page = generate_page(
+            path,
+            self.paths["template_path"],
+            os.path.join(self.paths["public_dir"], "b.html"),
+            index_terms=True,
+        )
+        self.assertIn("text", page.terms)
+        self.assertNotIn("subscribe", page.terms)
+
+    def test_front_matter_error_names_page(self):
+        path = self.write_page(
+            os.path.join("a", "b.md"), "---\ndate: someday\n---\n# B"
+        )
+        with self.assertRaisesRegex(ValueError, f"^{re.escape(path)}: Invalid date"):
+            self.build("public", 1)
+
+    def test_drafts_skipped(self):
+        self.write_page(os.path.join("a", "b.md"), "+++\ndraft = true\n+++\n# Draft")
+        outputs, urls = self.build("public", 1)
+        self.assertEqual(urls, ["/", "/a/", "/c/d/"])
+        self.assertNotIn(os.path.join("a", "b.html"), outputs)
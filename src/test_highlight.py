@@ -0,0 +1,122 @@
+import importlib.util
+import pickle
+import tempfile
+import unittest
+
+from generate import LeafNode, ParentNode, RawNode, node_text, render_code
+from highlight import (
+    HighlightCache,
+    PygmentsHighlighter,
+    cached_highlighter,
+    load_highlighter,
+)
+from parse import parse_code
+
+
+class UpperHighlighter:
+    name = "upper-1"
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, code, language):
+        self.calls += 1
+        if language != "shout":
+            return None
+        return f"<b>{code.upper()}</b>"
+
+
+class TestParseCode(unittest.TestCase):
+    def test_language(self):
+        self.assertEqual(parse_code("```python\nx = 1\n```"), ("python", "x = 1\n"))
+
+    def test_no_language(self):
+        self.assertEqual(parse_code("```\nx = 1\n```"), ("", "x = 1\n"))
+
+
+class TestRenderCode(unittest.TestCase):
+    def test_highlighted(self):
+        node = render_code(("shout", "hi"), UpperHighlighter())
+        expected = ParentNode(
+            "pre",
+            [ParentNode("code", [RawNode("<b>HI</b>")], {"class": "language-shout"})],
+            {"class": "highlight"},
+        )
+        self.assertEqual(node, expected)
+        self.assertEqual(
+            node.to_html(),
+            '<pre class="highlight"><code class="language-shout"><b>HI</b></code></pre>',
+        )
+
+    def test_unknown_language(self):
+        node = render_code(("other", "a < b"), UpperHighlighter())
+        expected = ParentNode(
+            "pre",
+            [ParentNode("code", [LeafNode(None, "a < b")], {"class": "language-other"})],
+        )
+        self.assertEqual(node, expected)
+
+    def test_highlighted_text_is_searchable(self):
+        node = render_code(("shout", "hi"), UpperHighlighter())
+        self.assertEqual(list(node_text(node)), ["hi"])
+
+
+class TestHighlightCache(unittest.TestCase):
+    def test_identical_snippets_highlighted_once(self):
+        highlighter = UpperHighlighter()
+        cache = HighlightCache(highlighter)
+        for _ in range(3):
+            self.assertEqual(cache("hi", "shout"), "<b>HI</b>")
+        self.assertEqual(highlighter.calls, 1)
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_persistent(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            HighlightCache(UpperHighlighter(), cache_dir)("hi", "shout")
+            HighlightCache(UpperHighlighter(), cache_dir)("nope", "other")
+
+            highlighter = UpperHighlighter()
+            cache = HighlightCache(highlighter, cache_dir)
+            self.assertEqual(cache("hi", "shout"), "<b>HI</b>")
+            self.assertIsNone(cache("nope", "other"))
+            self.assertEqual(highlighter.calls, 0)
+
+    def test_pickled_without_snippets(self):
+        cache = HighlightCache(UpperHighlighter())
+        cache("hi", "shout")
+        self.assertEqual(pickle.loads(pickle.dumps(cache)).snippets, {})
+        self.assertEqual(len(cache.snippets), 1)
+
+
+class TestLoadHighlighter(unittest.TestCase):
+    def test_none(self):
+        self.assertIsNone(load_highlighter("none"))
+
+    def test_factory(self):
+        highlighter = load_highlighter("test_highlight:UpperHighlighter")
+        self.assertEqual(highlighter.name, "upper-1")
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, load_highlighter, "not-a-highlighter")
+
+    def test_cached_per_process(self):
+        spec = "test_highlight:UpperHighlighter"
+        first = cached_highlighter(spec)
+        self.assertIsInstance(first, HighlightCache)
+        self.assertIs(cached_highlighter(spec), first)
+        self.assertIsNone(cached_highlighter("none"))
+
+
+@unittest.skipUnless(importlib.util.find_spec("pygments"), "pygments not installed")
+class TestPygmentsHighlighter(unittest.TestCase):
+    def test_python(self):
+        html = PygmentsHighlighter()('print("a<b")\n', "python")
+        self.assertIn('<span class="nb">print</span>', html)
+        self.assertIn("&lt;", html)
+
+    def test_unknown_language(self):
+        self.assertIsNone(PygmentsHighlighter()("x", "no-such-language"))
+
+
+if __name__ == "__main__":
+    unittest.main()
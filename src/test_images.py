@@ -0,0 +1,156 @@
+import importlib.util
+import os
+import struct
+import tempfile
+import unittest
+from unittest import mock
+
+from generate import LeafNode, ParentNode, add_image_props
+from images import ImageProcessor, image_size, variant_name
+
+
+def png_header(width, height):
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + ihdr + b"\0" * 4
+
+
+def jpeg_header(width, height):
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\0" + b"\0" * 9
+    sof0 = b"\xff\xc0" + struct.pack(">HBHHB", 17, 8, height, width, 3) + b"\0" * 9
+    return b"\xff\xd8" + app0 + sof0
+
+
+class TestImageSize(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def size_of(self, data):
+        path = os.path.join(self.tmp.name, "image")
+        with open(path, "wb") as image:
+            image.write(data)
+        return image_size(path)
+
+    def test_png(self):
+        self.assertEqual(self.size_of(png_header(1344, 896)), (1344, 896))
+
+    def test_gif(self):
+        self.assertEqual(self.size_of(b"GIF89a" + struct.pack("<HH", 20, 10)), (20, 10))
+
+    def test_jpeg(self):
+        self.assertEqual(self.size_of(jpeg_header(640, 480)), (640, 480))
+
+    def test_webp_lossless(self):
+        bits = (300 - 1) | ((200 - 1) << 14)
+        data = b"RIFF\0\0\0\0WEBPVP8L\0\0\0\0\x2f" + struct.pack("<I", bits)
+        self.assertEqual(self.size_of(data + b"\0" * 8), (300, 200))
+
+    def test_unknown(self):
+        self.assertIsNone(self.size_of(b"not an image at all, just some text"))
+
+    def test_truncated(self):
+        for data in [
+            b"\xff\xd8\xff\xe0\x00",
+            b"GIF89a\x01",
+            png_header(6, 3)[:20],
+            jpeg_header(6, 3)[:-12],
+            b"\xff\xd8\xff\xe0\x00\x00",
+        ]:
+            with self.subTest(data=data):
+                self.assertIsNone(self.size_of(data))
+
+
+class TestVariantName(unittest.TestCase):
+    def test_variant_name(self):
+        self.assertEqual(variant_name("/images/a.png", 480), "/images/a-480w.png")
+
+
+class TestAddImageProps(unittest.TestCase):
+    def test_known_and_unknown_images(self):
+        node = ParentNode(
+            "p",
+            [
+                LeafNode("img", None, {"src": "/a.png", "alt": "A"}),
+                LeafNode("img", None, {"src": "https://x.com/b.png", "alt": "B"}),
+            ],
+        )
+        add_image_props(node, {"/a.png": {"width": "2", "height": "1"}})
+        self.assertEqual(
+            node.to_html(),
+            '<p><img src="/a.png" alt="A" width="2" height="1">'
+            '<img src="https://x.com/b.png" alt="B" loading="lazy"></p>',
+        )
+
+
+class TestImageProcessor(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static_dir = os.path.join(self.tmp.name, "static")
+        self.public_dir = os.path.join(self.tmp.name, "public")
+        self.cache_dir = os.path.join(self.tmp.name, "cache")
+        os.makedirs(os.path.join(self.static_dir, "images"))
+        os.makedirs(self.public_dir)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def processor(self):
+        return ImageProcessor(
+            self.static_dir, self.public_dir, self.cache_dir, widths=(4, 8)
+        )
+
+    def test_dimensions(self):
+        with open(os.path.join(self.static_dir, "images", "a.png"), "wb") as image:
+            image.write(png_header(6, 3))
+        with open(os.path.join(self.static_dir, "notes.txt"), "w") as notes:
+            notes.write("not an image")
+        with open(os.path.join(self.static_dir, "broken.gif"), "wb") as broken:
+            broken.write(b"GIF89a\x01")
+
+        images = self.processor().process()
+        self.assertEqual(list(images), ["/images/a.png"])
+        self.assertEqual(images["/images/a.png"]["width"], "6")
+        self.assertEqual(images["/images/a.png"]["height"], "3")
+        self.assertEqual(images["/images/a.png"]["loading"], "lazy")
+
+    @unittest.skipUnless(importlib.util.find_spec("PIL"), "Pillow not installed")
+    def test_variants_cached(self):
+        from PIL import Image
+
+        Image.new("RGB", (10, 5)).save(os.path.join(self.static_dir, "images", "a.png"))
+
+        first = self.processor()
+        images = first.process()
+        self.assertEqual(
+            images["/images/a.png"]["srcset"],
+            "/images/a-4w.png 4w, /images/a-8w.png 8w, /images/a.png 10w",
+        )
+        with Image.open(os.path.join(self.public_dir, "images", "a-4w.png")) as variant:
+            self.assertEqual(variant.size, (4, 2))
+        self.assertEqual((first.processed, first.reused), (1, 0))
+
+        second = self.processor()
+        self.assertEqual(second.process(), images)
+        self.assertEqual((second.processed, second.reused), (0, 1))
+
+    def test_manifest_shared_by_static_dirs(self):
+        other_dir = os.path.join(self.tmp.name, "other")
+        os.makedirs(os.path.join(other_dir, "images"))
+        for static_dir, width in ((self.static_dir, 6), (other_dir, 2)):
+            with open(os.path.join(static_dir, "images", "a.png"), "wb") as image:
+                image.write(png_header(width, 3))
+        other = ImageProcessor(other_dir, self.public_dir, self.cache_dir)
+
+        self.processor().process()
+        self.assertEqual(other.process()["/images/a.png"]["width"], "2")
+        # each directory's entry survives the other's build, so neither rehashes
+        with mock.patch("images.file_hash", side_effect=AssertionError):
+            images = self.processor().process()
+            self.assertEqual(other.process()["/images/a.png"]["width"], "2")
+        self.assertEqual(images["/images/a.png"]["width"], "6")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import json
+import os
+import unittest
+
+from fixtures import SiteTestCase
+from generate import Page
+from main import run_build
+from metrics import Metrics
+
+
+class TestMetrics(unittest.TestCase):
+    def test_counters(self):
+        metrics = Metrics()
+        metrics.inc("ssg_static_files_total", action="copied")
+        metrics.inc("ssg_static_files_total", 2, action="copied")
+        self.assertEqual(metrics.get("ssg_static_files_total", action="copied"), 3)
+        self.assertEqual(metrics.get("ssg_static_files_total", action="linked"), 0)
+
+    def test_record_page(self):
+        metrics = Metrics()
+        page = Page("a.md", "a.html", "A", 0.0, [], 120, 0.002, {"parse": (1, 0)})
+        metrics.record_page(page)
+        metrics.record_page(page._replace(cache_stats={"parse": (0, 1)}))
+        self.assertEqual(metrics.get("ssg_pages_generated_total"), 2)
+        self.assertEqual(metrics.get("ssg_bytes_written_total", kind="page"), 240)
+        self.assertEqual(metrics.cache_hit_rates(), {"parse": 0.5})
+
+    def test_prometheus(self):
+        metrics = Metrics()
+        metrics.inc("ssg_pages_generated_total", 3)
+        metrics.observe("ssg_page_render_seconds", 0.003)
+        metrics.observe("ssg_page_render_seconds", 2)
+        text = metrics.to_prometheus()
+        self.assertIn("# TYPE ssg_pages_generated_total counter\n", text)
+        self.assertIn("ssg_pages_generated_total 3\n", text)
+        self.assertIn('ssg_page_render_seconds_bucket{le="0.001"} 0\n', text)
+        self.assertIn('ssg_page_render_seconds_bucket{le="0.005"} 1\n', text)
+        self.assertIn('ssg_page_render_seconds_bucket{le="+Inf"} 2\n', text)
+        self.assertIn("ssg_page_render_seconds_count 2\n", text)
+        self.assertNotIn("ssg_peak_rss_bytes", text)
+
+    def test_merge(self):
+        metrics, other = Metrics(), Metrics()
+        for each in (metrics, other):
+            each.inc("ssg_pages_generated_total", 2)
+            each.observe("ssg_page_size_bytes", 500)
+        metrics.set("ssg_stage_duration_seconds", 1.0, stage="pages")
+        other.set("ssg_stage_duration_seconds", 3.0, stage="pages")
+        metrics.merge(other)
+        self.assertEqual(metrics.get("ssg_pages_generated_total"), 4)
+        self.assertEqual(metrics.get("ssg_stage_duration_seconds", stage="pages"), 3)
+        histogram = next(iter(metrics.histograms.values()))
+        self.assertEqual(histogram.count, 2)
+
+
+class TestBuildMetrics(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        for name in ["index.md", os.path.join("blog", "post.md")]:
+            self.write_page(name, f"# {name}\n\nSome text")
+        self.write_static("site.css", "body {}")
+        self.write_template("{{ Content }}")
+
+    def report(self):
+        with open(os.path.join(self.paths["metrics_dir"], "build.json")) as report:
+            return json.load(report)
+
+    def value(self, report, name, **labels):
+        for sample in report["metrics"].get(name, []):
+            if sample["labels"] == labels:
+                return sample["value"]
+        return None
+
+    def test_build_writes_metrics(self):
+        run_build(**self.paths, highlighter="none", output="quiet")
+        report = self.report()
+        self.assertEqual(self.value(report, "ssg_pages_generated_total"), 2)
+        self.assertEqual(
+            self.value(report, "ssg_static_files_total", action="copied"), 1
+        )
+        self.assertEqual(
+            self.value(report, "ssg_bytes_written_total", kind="static"), 7
+        )
+        for stage in ["static", "pages", "index", "total"]:
+            self.assertIsNotNone(
+                self.value(report, "ssg_stage_duration_seconds", stage=stage)
+            )
+        self.assertGreater(
+            self.value(report, "ssg_peak_rss_bytes", process="main"), 0
+        )
+        self.assertEqual(report["cache_hit_rates"], {"parse": 0.0})
+
+        with open(os.path.join(self.paths["metrics_dir"], "build.prom")) as text:
+            self.assertIn("ssg_pages_generated_total 2\n", text.read())
+
+    def test_parallel_cache_hits(self):
+        # parse cache counters come back from the worker processes
+        run_build(**self.paths, highlighter="none", output="quiet")
+        run_build(**self.paths, highlighter="none", output="quiet", jobs=2)
+        self.assertEqual(self.report()["cache_hit_rates"], {"parse": 1.0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,6 +7,7 @@ from parse import (
     extract_markdown_images,
     extract_markdown_links,
     markdown_to_blocks,
+    parse_markdown,
     split_nodes_delimeter,
     split_nodes_image,
     split_nodes_link,
@@ -294,6 +295,11 @@ class TestBlockToBlockType(unittest.TestCase):
         block_type = block_to_block_type(block)
         self.assertEqual(block_type, BlockType.CODE)
 
+    def test_code_with_language(self):
+        block = "```python\nprint('hi')\n```"
+        block_type = block_to_block_type(block)
+        self.assertEqual(block_type, BlockType.CODE)
+
     def test_code_missing_backticks(self):
         block = "```\nthis is code\n"
         block_type = block_to_block_type(block)
@@ -340,5 +346,117 @@ class TestBlockToBlockType(unittest.TestCase):
         self.assertEqual(block_type, BlockType.PARAGRAPH)
 
 
+class TestParseMarkdown(unittest.TestCase):
+    def test_nested_list(self):
+        blocks = parse_markdown("- a\n  - b\n- c")
+        self.assertEqual(
+            blocks,
+            [
+                (
+                    BlockType.UNORDERED,
+                    [
+                        [
+                            (BlockType.PARAGRAPH, [TextNode("a", TextType.TEXT)]),
+                            (
+                                BlockType.UNORDERED,
+                                [
+                                    [
+                                        (
+                                            BlockType.PARAGRAPH,
+                                            [TextNode("b", TextType.TEXT)],
+                                        )
+                                    ]
+                                ],
+                            ),
+                        ],
+                        [(BlockType.PARAGRAPH, [TextNode("c", TextType.TEXT)])],
+                    ],
+                )
+            ],
+        )
+
+    def test_multi_paragraph_item(self):
+        blocks = parse_markdown("1. one\n\n   more\n2. two")
+        start, items = blocks[0][1]
+        self.assertEqual(start, 1)
+        self.assertEqual([len(item) for item in items], [2, 1])
+
+    def test_ordered_start_past_nine(self):
+        blocks = parse_markdown("9. a\n10. b\n11. c")
+        self.assertEqual(blocks[0][0], BlockType.ORDERED)
+        start, items = blocks[0][1]
+        self.assertEqual((start, len(items)), (9, 3))
+
+    def test_code_with_blank_lines(self):
+        blocks = parse_markdown("```python\nx = 1\n\ny = 2\n```\nafter")
+        self.assertEqual(blocks[0], (BlockType.CODE, ("python", "x = 1\n\ny = 2\n")))
+        self.assertEqual(blocks[1][0], BlockType.PARAGRAPH)
+
+    def test_lazy_continuation(self):
+        blocks = parse_markdown("- item\ncontinued")
+        self.assertEqual(
+            blocks,
+            [
+                (
+                    BlockType.UNORDERED,
+                    [
+                        [
+                            (
+                                BlockType.PARAGRAPH,
+                                [TextNode("item\ncontinued", TextType.TEXT)],
+                            )
+                        ]
+                    ],
+                )
+            ],
+        )
+
+    def test_heading_ends_at_line(self):
+        blocks = parse_markdown("### Heading\nText")
+        self.assertEqual(
+            [block_type for block_type, _ in blocks],
+            [BlockType.HEADING, BlockType.PARAGRAPH],
+        )
+
+    def test_thematic_breaks(self):
+        for markdown in ("* * *", "***", "- - -", "___", "  *  *  *  "):
+            with self.subTest(markdown=markdown):
+                self.assertEqual(
+                    parse_markdown(markdown), [(BlockType.THEMATIC_BREAK, None)]
+                )
+
+    def test_thematic_break_in_item(self):
+        blocks = parse_markdown("- * * *\n- b")
+        items = blocks[0][1]
+        self.assertEqual(items[0], [(BlockType.THEMATIC_BREAK, None)])
+
+    def test_thematic_break_interrupts_paragraph(self):
+        blocks = parse_markdown("Text\n***")
+        self.assertEqual(
+            [block_type for block_type, _ in blocks],
+            [BlockType.PARAGRAPH, BlockType.THEMATIC_BREAK],
+        )
+
+    def test_ordered_item_past_one_continues_paragraph(self):
+        blocks = parse_markdown("published in\n1954. It was")
+        self.assertEqual(
+            blocks,
+            [
+                (
+                    BlockType.PARAGRAPH,
+                    [TextNode("published in\n1954. It was", TextType.TEXT)],
+                )
+            ],
+        )
+
+    def test_ordered_item_one_interrupts_paragraph(self):
+        blocks = parse_markdown("Steps:\n1. a\n2. b")
+        self.assertEqual(
+            [block_type for block_type, _ in blocks],
+            [BlockType.PARAGRAPH, BlockType.ORDERED],
+        )
+        self.assertEqual(len(blocks[1][1][1]), 2)
+
+
 if __name__ == "__main__":
     unittest.main()
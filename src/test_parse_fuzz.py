@@ -0,0 +1,172 @@
+import random
+import re
+import sys
+import time
+import unittest
+from contextlib import contextmanager
+
+from parse import (
+    block_to_block_type,
+    extract_markdown_images,
+    extract_markdown_links,
+    parse_markdown,
+    text_to_textnodes,
+)
+
+SEED = 20240501
+# pieces chosen to hit every branch of the block and inline parsers, valid or
+# not: markers, unclosed delimiters, stray brackets and malformed lists
+FRAGMENTS = [
+    "#",
+    "# ",
+    "###### ",
+    "####### ",
+    "> ",
+    ">",
+    "- ",
+    "* ",
+    "1. ",
+    "2. ",
+    "1x. ",
+    "10. ",
+    "1)",
+    "* * *",
+    "***",
+    "- - -",
+    "```",
+    "```python",
+    "`",
+    "**",
+    "*",
+    "[",
+    "]",
+    "(",
+    ")",
+    "![",
+    "](",
+    "[a](b)",
+    "![a](b)",
+    "text",
+    "ünïcødé",
+    " ",
+    "  ",
+    "\t",
+    "\n",
+    "\n\n",
+    "\n   \n",
+]
+
+# the largest input is this many times the smallest; linear parsing keeps the
+# time ratio near it, quadratic parsing would be SCALE times that
+SCALE = 8
+MAX_RATIO = SCALE * 3
+TIME_BUDGET = 2.0
+
+
+def random_markdown(rng: random.Random, pieces: int) -> str:
+    return "".join(rng.choice(FRAGMENTS) for _ in range(pieces))
+
+
+def parse_or_reject(markdown: str):
+    # ValueError is how the parser reports unclosed inline formatting; any
+    # other exception is a bug
+    try:
+        return parse_markdown(markdown)
+    except ValueError:
+        return None
+
+
+@contextmanager
+def recursion_limit(limit: int):
+    old_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(limit)
+    try:
+        yield
+    finally:
+        sys.setrecursionlimit(old_limit)
+
+
+def best_time(function, argument, runs: int = 3) -> float:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function(argument)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+class TestParseFuzz(unittest.TestCase):
+    def test_random_documents(self):
+        rng = random.Random(SEED)
+        for _ in range(2000):
+            markdown = random_markdown(rng, rng.randint(1, 40))
+            with self.subTest(markdown=markdown):
+                parse_or_reject(markdown)
+
+    def test_links_match_regex(self):
+        # the linear scanner must find exactly what the original regexes did
+        rng = random.Random(SEED)
+        alphabet = "[]()!a \n"
+        for _ in range(5000):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 16)))
+            with self.subTest(text=text):
+                self.assertEqual(
+                    extract_markdown_links(text),
+                    re.findall(r"\[(.*?)\]\((.*?)\)", text),
+                )
+                self.assertEqual(
+                    extract_markdown_images(text),
+                    re.findall(r"!\[(.*?)\]\((.*?)\)", text),
+                )
+
+    def test_malformed_ordered_lists(self):
+        for markdown in ["1. a\n1x. b", "1. a\n2", "1. a\n2) b", "1. a\n\t\n2. b"]:
+            with self.subTest(markdown=markdown):
+                self.assertEqual(block_to_block_type(markdown), "paragraph")
+                parse_markdown(markdown)
+
+    def test_bare_markers(self):
+        for markdown in ["#", "##", "#\nfoo", "> a\n  \n> b", "- a\n \n- b"]:
+            with self.subTest(markdown=markdown):
+                parse_markdown(markdown)
+
+    def test_link_dense_text_has_no_recursion(self):
+        # one stack frame per link used to overflow on link-heavy paragraphs
+        text = "[a](b) ![c](d) " * 5000
+        with recursion_limit(100):
+            nodes = text_to_textnodes(text)
+        self.assertEqual(len(nodes), 20000)
+
+
+class TestParseScaling(unittest.TestCase):
+    def assert_linear(self, name: str, function, make_input):
+        small = best_time(function, make_input(1))
+        large = best_time(function, make_input(SCALE))
+        # below a millisecond the ratio is mostly timer noise
+        ratio = large / max(small, 0.001)
+        self.assertLess(large, TIME_BUDGET, f"{name} took {large:.2f}s")
+        self.assertLess(ratio, MAX_RATIO, f"{name} scaled {ratio:.1f}x for {SCALE}x")
+
+    def test_worst_cases(self):
+        size = 1000
+        cases = {
+            "links": lambda n: "[a](b) " * size * n,
+            "images": lambda n: "![a](b) " * size * n,
+            "open brackets": lambda n: "[" * size * n,
+            "unclosed link": lambda n: "[" * size * n + "](",
+            "unclosed image": lambda n: "![" * size * n + "](a",
+            "emphasis": lambda n: "*a* **b** `c` " * size * n,
+            "quote": lambda n: "> line\n" * size * n,
+            "unordered list": lambda n: "- item\n" * size * n,
+            "ordered list": lambda n: "".join(
+                f"{i}. item\n" for i in range(1, size * n + 1)
+            ),
+            "blocks": lambda n: "para\n\n" * size * n,
+        }
+        for name, make_input in cases.items():
+            with self.subTest(case=name):
+                self.assert_linear(name, parse_or_reject, make_input)
+
+
+if __name__ == "__main__":
+    unittest.main()
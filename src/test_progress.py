@@ -0,0 +1,87 @@
+import io
+import json
+import unittest
+
+from generate import Page
+from progress import Reporter, format_duration
+
+
+class CountingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+def pages(count):
+    for page in range(count):
+        yield Page(f"p{page}.md", f"p{page}.html", f"Page {page}", 0.0, [], 100, 0.001)
+
+
+def run(reporter, count):
+    reporter.start(count)
+    for page in pages(count):
+        reporter.page(page)
+    reporter.finish()
+
+
+class TestReporter(unittest.TestCase):
+    def test_quiet(self):
+        stream = io.StringIO()
+        run(Reporter("quiet", stream, interval=0), 5)
+        self.assertEqual(stream.getvalue(), "")
+
+    def test_verbose_is_buffered(self):
+        stream = CountingStream()
+        run(Reporter("verbose", stream, interval=60), 50)
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 51)
+        self.assertEqual(lines[0], "Generated p0.html from p0.md in 1.0 ms")
+        self.assertTrue(lines[-1].startswith("Generated 50 pages in "))
+        self.assertEqual(stream.writes, 1)
+
+    def test_buffer_size(self):
+        stream = CountingStream()
+        run(Reporter("verbose", stream, interval=60, buffer_size=10), 50)
+        self.assertEqual(stream.writes, 6)
+
+    def test_progress(self):
+        stream = io.StringIO()
+        run(Reporter("progress", stream, interval=0), 4)
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertTrue(lines[1].startswith(f"[{'#' * 15}{' ' * 15}] 2/4 pages, "))
+        self.assertIn(" ETA ", lines[1])
+        self.assertNotIn("p0.md", stream.getvalue())
+
+    def test_json(self):
+        stream = io.StringIO()
+        run(Reporter("json", stream, interval=60), 3)
+        events = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(
+            [event["event"] for event in events],
+            ["start", "page", "page", "page", "finish"],
+        )
+        self.assertEqual(events[1]["source"], "p0.md")
+        self.assertEqual(events[1]["bytes"], 100)
+        self.assertEqual(events[-1]["pages"], 3)
+
+    def test_single_page(self):
+        stream = io.StringIO()
+        run(Reporter("progress", stream, interval=60), 1)
+        self.assertTrue(stream.getvalue().startswith("Generated 1 page in "))
+
+    def test_unknown_mode(self):
+        self.assertRaises(ValueError, Reporter, "loud")
+
+    def test_format_duration(self):
+        self.assertEqual(format_duration(5), "0:05")
+        self.assertEqual(format_duration(125), "2:05")
+        self.assertEqual(format_duration(3725), "1:02:05")
+
+
+if __name__ == "__main__":
+    unittest.main()
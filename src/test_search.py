@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+import unittest
+
+from generate import LeafNode, ParentNode, node_text
+from search import SearchIndex, page_terms, shard_key
+
+
+class TestPageTerms(unittest.TestCase):
+    def test_terms(self):
+        node = ParentNode(
+            "div",
+            [
+                LeafNode("p", "The Shire, the Shire!"),
+                LeafNode("img", None, {"src": "/a.png", "alt": "Hobbit hole"}),
+            ],
+        )
+        self.assertEqual(
+            page_terms(["A Title", *node_text(node)]),
+            ["hobbit", "hole", "shire", "the", "title"],
+        )
+
+
+class TestShardKey(unittest.TestCase):
+    def test_prefix(self):
+        self.assertEqual(shard_key("hobbit", 2), "ho")
+
+    def test_non_ascii(self):
+        self.assertEqual(shard_key("éowyn", 2), "_")
+
+
+class TestSearchIndex(unittest.TestCase):
+    def test_write_index(self):
+        with tempfile.TemporaryDirectory() as public_dir:
+            index = SearchIndex(public_dir, buffer_size=1)
+            index.add_page("/", "Home", ["hobbits", "home", "live", "here"])
+            index.add_page("/shire/", "Shire", ["hobbits", "of", "the", "shire"])
+            index.close()
+
+            search_dir = os.path.join(public_dir, "search")
+            with open(os.path.join(search_dir, "pages.json")) as pages_file:
+                pages = json.load(pages_file)
+            with open(os.path.join(search_dir, "index.json")) as manifest_file:
+                manifest = json.load(manifest_file)
+            with open(os.path.join(search_dir, "shards", "ho.json")) as shard_file:
+                shard = json.load(shard_file)
+
+            self.assertEqual(pages, [["/", "Home"], ["/shire/", "Shire"]])
+            self.assertEqual(manifest["pages"], 2)
+            self.assertIn("ho", manifest["shards"])
+            self.assertEqual(shard, {"hobbits": [0, 1], "home": [0]})
+            self.assertFalse(os.path.exists(os.path.join(search_dir, ".spool")))
+
+    def test_abort(self):
+        with tempfile.TemporaryDirectory() as public_dir:
+            index = SearchIndex(public_dir, buffer_size=1)
+            index.add_page("/", "Home", ["hobbits"])
+            index.abort()
+
+            search_dir = os.path.join(public_dir, "search")
+            self.assertTrue(index.pages_file.closed)
+            self.assertFalse(os.path.exists(os.path.join(search_dir, ".spool")))
+            self.assertFalse(os.path.exists(os.path.join(search_dir, "index.json")))
+
+
+if __name__ == "__main__":
+    unittest.main()
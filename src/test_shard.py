@@ -0,0 +1,140 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from fixtures import SiteTestCase
+from shard import ShardManifest, merge_shards, parse_shard, shard_of
+from test_images import png_header
+from verify import tree_hashes
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+
+class TestParseShard(unittest.TestCase):
+    def test_valid(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+
+    def test_out_of_range(self):
+        self.assertRaises(ValueError, parse_shard, "4/4")
+
+    def test_malformed(self):
+        self.assertRaises(ValueError, parse_shard, "two/four")
+
+
+class TestShardOf(unittest.TestCase):
+    def test_stable(self):
+        self.assertEqual(shard_of("blog/post.md", 7), shard_of("blog/post.md", 7))
+
+    def test_spreads_pages(self):
+        shards = {shard_of(f"page-{page}.md", 4) for page in range(100)}
+        self.assertEqual(shards, {0, 1, 2, 3})
+
+
+class TestMergeShards(SiteTestCase):
+    def shard_dir(self, index, count):
+        shard_dir = os.path.join(self.root, f"shard-{index}-{count}")
+        os.makedirs(shard_dir, exist_ok=True)
+        manifest = ShardManifest(shard_dir, (index, count))
+        manifest.add(index, f"/p{index}.html", f"Page {index}", 0.0, [])
+        manifest.close()
+        return shard_dir
+
+    def merge(self, shard_dirs):
+        public_dir = os.path.join(self.root, "public")
+        merge_shards(shard_dirs, public_dir, self.paths["template_path"], "http://x")
+        return public_dir
+
+    def test_all_shards(self):
+        public_dir = self.merge([self.shard_dir(index, 3) for index in range(3)])
+        self.assertTrue(os.path.exists(os.path.join(public_dir, "sitemap.xml")))
+
+    def test_missing_shard(self):
+        shard_dirs = [self.shard_dir(0, 3), self.shard_dir(2, 3)]
+        with self.assertRaisesRegex(ValueError, "got 0/3, 2/3"):
+            self.merge(shard_dirs)
+
+    def test_duplicate_shard(self):
+        shard_dirs = [self.shard_dir(index, 3) for index in (0, 0, 1, 2)]
+        with self.assertRaisesRegex(ValueError, "got 0/3, 0/3, 1/3, 2/3"):
+            self.merge(shard_dirs)
+
+    def test_different_counts(self):
+        with self.assertRaises(ValueError):
+            self.merge([self.shard_dir(0, 2), self.shard_dir(1, 3)])
+
+    def test_not_a_shard(self):
+        with self.assertRaisesRegex(ValueError, "no shard manifest"):
+            self.merge([self.root])
+
+
+class TestShardedBuild(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        for page in range(12):
+            self.write_page(
+                os.path.join(f"section-{page % 3}", f"p{page}.md"),
+                f"# Page {page}\n\nWords for page {page} and *more*",
+            )
+        self.write_page("index.md", "# Home\n\nThe home page")
+        self.write_static("site.css", "body {}")
+        self.write_static("logo.png", png_header(40, 20))
+        # listings written by the merge carry the fragment's image props too
+        self.write_file(
+            os.path.join(self.root, "fragments", "footer.md"), "![Logo](/logo.png)"
+        )
+        self.write_template("<title>{{ Title }}</title>{{ Content }}{{ Footer }}")
+
+    def command(self, public, *args):
+        return [
+            sys.executable,
+            MAIN,
+            "--content",
+            self.paths["content_dir"],
+            "--static",
+            self.paths["static_dir"],
+            "--template",
+            self.paths["template_path"],
+            "--public",
+            os.path.join(self.root, public),
+            "--highlighter",
+            "none",
+            "--no-cache",
+            "--metrics-dir",
+            os.path.join(self.root, "metrics", public),
+            *args,
+        ]
+
+    def test_merged_shards_match_single_build(self):
+        subprocess.run(self.command("single"), check=True, stdout=subprocess.DEVNULL)
+
+        # each shard runs in its own process, as it would on its own runner
+        shard_count = 3
+        processes = [
+            subprocess.Popen(
+                self.command(f"shard-{index}", "--shard", f"{index}/{shard_count}"),
+                stdout=subprocess.DEVNULL,
+            )
+            for index in range(shard_count)
+        ]
+        for process in processes:
+            self.assertEqual(process.wait(), 0)
+
+        shard_dirs = [os.path.join(self.root, f"shard-{i}") for i in range(shard_count)]
+        subprocess.run(
+            self.command("merged", "--merge", *shard_dirs),
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+
+        listing_path = os.path.join(self.root, "merged", "section-0", "index.html")
+        with open(listing_path) as listing:
+            self.assertIn('width="40"', listing.read())
+        self.assertEqual(
+            tree_hashes(os.path.join(self.root, "merged")),
+            tree_hashes(os.path.join(self.root, "single")),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+import sites
+from fixtures import SiteTestCase
+from sites import build_sites, load_sites
+
+
+class TestSites(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        for locale, heading in [("en", "Hello"), ("fr", "Bonjour")]:
+            self.write_page(
+                os.path.join(locale, "index.md"), f"# {heading}\n\nShared **text**"
+            )
+        self.write_static("site.css", "body {}")
+
+        self.config_path = os.path.join(self.root, "sites.json")
+        self.write_config(
+            [
+                {
+                    "name": locale,
+                    "content": f"content/{locale}",
+                    "public": f"public/{locale}",
+                    "static": "static",
+                    "template": "template.html",
+                    "base_url": f"https://{locale}.example.com",
+                }
+                for locale in ["en", "fr"]
+            ]
+        )
+
+    def write_config(self, sites):
+        with open(self.config_path, "w") as config:
+            json.dump({"sites": sites}, config)
+
+    def public(self, *parts):
+        return os.path.join(self.root, "public", *parts)
+
+    def test_load_sites(self):
+        sites = load_sites(self.config_path)
+        self.assertEqual([site.name for site in sites], ["en", "fr"])
+        self.assertEqual(sites[1].content_dir, os.path.join(self.root, "content", "fr"))
+        self.assertEqual(sites[1].base_url, "https://fr.example.com")
+
+    def test_overlapping_outputs(self):
+        self.write_config(
+            [
+                {"name": "root", "content": "content/en", "public": "public"},
+                {"name": "fr", "content": "content/fr", "public": "public/fr"},
+            ]
+        )
+        self.assertRaises(ValueError, load_sites, self.config_path)
+
+    def build(self, jobs):
+        build_sites(
+            load_sites(self.config_path),
+            os.path.join(self.root, "cache"),
+            jobs=jobs,
+            highlighter="none",
+            output="quiet",
+        )
+
+    def test_build(self):
+        self.build(jobs=1)
+        with open(self.public("fr", "index.html")) as page:
+            self.assertIn("<title>Bonjour</title>", page.read())
+        with open(self.public("en", "sitemap.xml")) as sitemap:
+            self.assertIn("https://en.example.com/", sitemap.read())
+        # linked by every page, so written even with nothing to highlight
+        with open(self.public("en", "highlight.css")) as css:
+            self.assertEqual(css.read(), "")
+
+    def test_static_shared(self):
+        self.build(jobs=1)
+        self.assertTrue(
+            os.path.samefile(
+                self.public("en", "site.css"), self.public("fr", "site.css")
+            )
+        )
+
+    def test_page_replacing_static_file(self):
+        # static files are hard linked between sites; a page written over one
+        # must not show up in the other site
+        self.write_static("index.html", "static")
+        self.build(jobs=4)
+        with open(self.public("en", "index.html")) as page:
+            self.assertIn("<title>Hello</title>", page.read())
+        with open(self.public("fr", "index.html")) as page:
+            self.assertIn("<title>Bonjour</title>", page.read())
+        with open(os.path.join(self.root, "static", "index.html")) as static:
+            self.assertEqual(static.read(), "static")
+
+    def test_parallel(self):
+        self.build(jobs=2)
+        for locale in ["en", "fr"]:
+            self.assertTrue(os.path.exists(self.public(locale, "index.html")))
+            self.assertTrue(os.path.exists(self.public(locale, "search", "index.json")))
+
+    def test_spare_jobs_render_pages(self):
+        self.write_config([{"name": "en", "content": "content/en", "public": "public"}])
+        with mock.patch("sites.build_pages", wraps=sites.build_pages) as build_pages:
+            self.build(jobs=3)
+        self.assertEqual(build_pages.call_args.args[5], 3)
+
+    def test_shard_rejected(self):
+        main = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+        result = subprocess.run(
+            [sys.executable, main, "--sites", self.config_path, "--shard", "0/2"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        self.assertEqual(result.returncode, 2)
+        self.assertIn("--shard can't be combined with --sites", result.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import io
+import os
+import tempfile
+import unittest
+
+from fixtures import SiteTestCase
+from verify import compare_trees, tree_hashes, verify_build
+
+
+# highlights code with the id of the process that rendered it, so serial and
+# parallel builds disagree
+class PidHighlighter:
+    def __call__(self, code, language):
+        return f"<span>{os.getpid()}</span>"
+
+
+class TestCompareTrees(unittest.TestCase):
+    def test_differences(self):
+        first = {"a.html": "1", "b.html": "2", "c.html": "3"}
+        second = {"a.html": "1", "b.html": "x", "d.html": "4"}
+        self.assertEqual(
+            compare_trees(first, second, ("serial", "parallel")),
+            [
+                ("b.html", "differs"),
+                ("c.html", "only in serial build"),
+                ("d.html", "only in parallel build"),
+            ],
+        )
+
+    def test_tree_hashes(self):
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, "a"))
+            with open(os.path.join(root, "a", "page.html"), "w") as page:
+                page.write("page")
+            self.assertEqual(list(tree_hashes(root)), ["a/page.html"])
+
+
+class TestVerifyBuild(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        for page in range(6):
+            self.write_page(
+                os.path.join(f"section-{page % 2}", f"p{page}.md"),
+                f"# Page {page}\n\n```python\nprint({page})\n```",
+            )
+
+    def verify(self, highlighter):
+        stream = io.StringIO()
+        differences = verify_build(
+            jobs=2,
+            stream=stream,
+            content_dir=self.paths["content_dir"],
+            template_path=self.paths["template_path"],
+            public_dir=self.paths["public_dir"],
+            static_dir=self.paths["static_dir"],
+            highlighter=highlighter,
+        )
+        return differences, stream.getvalue()
+
+    def test_deterministic(self):
+        differences, report = self.verify("none")
+        self.assertEqual(differences, [])
+        self.assertIn("identical: ", report)
+        self.assertIn("parallel:  ", report)
+        self.assertFalse(os.path.exists(self.paths["public_dir"]))
+
+    def test_nondeterministic_pages_reported(self):
+        differences, report = self.verify("test_verify:PidHighlighter")
+        self.assertEqual(
+            [path for path, _ in differences],
+            [f"section-{page % 2}/p{page}.html" for page in (0, 2, 4, 1, 3, 5)],
+        )
+        self.assertIn("nondeterministic: 6 files", report)
+        self.assertIn("  section-0/p0.html: differs", report)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List, TextIO, Tuple
+
+from images import file_hash
+from main import build
+
+
+def tree_hashes(root: str) -> Dict[str, str]:
+    # relative path -> sha256 of every file under root
+    hashes = {}
+    for dir_path, dirs, files in os.walk(root):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(dir_path, name)
+            hashes[os.path.relpath(path, root).replace(os.sep, "/")] = file_hash(path)
+    return hashes
+
+
+def compare_trees(
+    first: Dict[str, str], second: Dict[str, str], names: Tuple[str, str]
+) -> List[Tuple[str, str]]:
+    # (path, problem) for every file that differs or is only in one tree
+    differences = []
+    for path in sorted(first.keys() | second.keys()):
+        if path not in second:
+            differences.append((path, f"only in {names[0]} build"))
+        elif path not in first:
+            differences.append((path, f"only in {names[1]} build"))
+        elif first[path] != second[path]:
+            differences.append((path, "differs"))
+    return differences
+
+
+# Builds the site twice into scratch directories, once in this process and
+# once across worker processes, and compares a hash of every output file; the
+# public directory is left alone. Both builds start without a cache, so
+# neither can reuse what the other wrote and the timings compare like for
+# like.
+def verify_build(
+    jobs: int = 1, stream: TextIO = None, **options
+) -> List[Tuple[str, str]]:
+    stream = stream or sys.stdout
+    parallel_jobs = max(jobs, 2)
+    runs = (("serial", 1), ("parallel", parallel_jobs))
+    options = {**options, "cache_dir": None, "output": "quiet"}
+    options.pop("public_dir", None)
+    hashes = []
+    timings = []
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        for name, run_jobs in runs:
+            public_dir = os.path.join(scratch_dir, name)
+            start = time.perf_counter()
+            build(**options, public_dir=public_dir, jobs=run_jobs)
+            timings.append(time.perf_counter() - start)
+            hashes.append(tree_hashes(public_dir))
+
+    differences = compare_trees(*hashes, tuple(name for name, _ in runs))
+    serial, parallel = timings
+    stream.write(
+        f"serial:    {serial:.3f}s (1 job)\n"
+        f"parallel:  {parallel:.3f}s ({parallel_jobs} jobs,"
+        f" {serial / parallel:.2f}x speedup)\n"
+    )
+    if differences:
+        stream.write(f"nondeterministic: {len(differences)} files\n")
+        for path, problem in differences:
+            stream.write(f"  {path}: {problem}\n")
+    else:
+        stream.write(f"identical: {len(hashes[0])} files\n")
+    return differences